@@ -27,6 +27,21 @@ class AbstractArray(abc.ABC):
     def tobytes(array):
         ...
 
+    @staticmethod
+    @abc.abstractmethod
+    def tobuffer(array):
+        ...
+
+    @staticmethod
+    @abc.abstractmethod
+    def version(array):
+        ...
+
+    @staticmethod
+    @abc.abstractmethod
+    def is_mutable(array):
+        ...
+
     @property
     @abc.abstractmethod
     def ndarray(self):
@@ -82,11 +97,21 @@ class AbstractArray(abc.ABC):
     def std(array):
         ...
 
+    @staticmethod
+    @abc.abstractmethod
+    def stats(array, stride=1):
+        ...
+
     @staticmethod
     @abc.abstractmethod
     def all(array):
         ...
 
+    @staticmethod
+    @abc.abstractmethod
+    def array_equal(lhs, rhs):
+        ...
+
     @staticmethod
     @abc.abstractmethod
     def is_floating(array):
@@ -14,9 +14,14 @@
 
 from __future__ import annotations
 
+from typing import Any
+
+import jax
 import jax.numpy as jnp
+import numpy as np
 
 from pytreeclass._src.backend.arraylib.base import AbstractArray
+from pytreeclass._src.backend.arraylib.numpy import NumpyArray
 
 
 class JaxArray(AbstractArray):
@@ -24,6 +29,21 @@ class JaxArray(AbstractArray):
     def tobytes(array: jnp.ndarray) -> bytes:
         return jnp.array(array).tobytes()
 
+    @staticmethod
+    def tobuffer(array: jnp.ndarray) -> memoryview:
+        # zero-copy for cpu arrays
+        array = np.ascontiguousarray(array)
+        return memoryview(array.reshape(-1).view(np.uint8))
+
+    @staticmethod
+    def version(array: jnp.ndarray) -> int:
+        # jax arrays are immutable
+        return 0
+
+    @staticmethod
+    def is_mutable(array: jnp.ndarray) -> bool:
+        return False
+
     @property
     def ndarray(self) -> type[jnp.ndarray]:
         return jnp.ndarray
@@ -68,10 +88,28 @@ class JaxArray(AbstractArray):
     def std(array: jnp.ndarray) -> jnp.ndarray:
         return jnp.std(array)
 
+    @staticmethod
+    def stats(array: jnp.ndarray, stride: int = 1) -> tuple[Any, Any, Any, Any]:
+        array = array if stride == 1 else array.ravel()[::stride]
+        if array.size <= 2**12:
+            # one transfer of a small array is cheaper than dispatching the
+            # reductions on the device
+            return NumpyArray.stats(np.asarray(array))
+        # the reductions are dispatched asynchronously and transferred to the
+        # host together, instead of blocking on each value
+        mean = jnp.mean(array)
+        std = jnp.sqrt(jnp.mean(jnp.square(array - mean)))
+        return jax.device_get((jnp.min(array), jnp.max(array), mean, std))
+
     @staticmethod
     def all(array: jnp.ndarray) -> jnp.ndarray:
         return jnp.all(array)
 
+    @staticmethod
+    def array_equal(lhs: jnp.ndarray, rhs: jnp.ndarray) -> bool:
+        # raises under transformations (e.g. `jit`)
+        return bool(jnp.array_equal(lhs, rhs))
+
     @staticmethod
     def is_floating(array: jnp.ndarray) -> bool:
         return jnp.issubdtype(array.dtype, jnp.floating)
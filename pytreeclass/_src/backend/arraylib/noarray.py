@@ -24,6 +24,18 @@ class NoArray(AbstractArray):
     def tobytes(array: Any) -> bytes:
         raise NotImplementedError
 
+    @staticmethod
+    def tobuffer(array: Any) -> memoryview:
+        raise NotImplementedError
+
+    @staticmethod
+    def version(array: Any):
+        raise NotImplementedError
+
+    @staticmethod
+    def is_mutable(array: Any) -> bool:
+        raise NotImplementedError
+
     @property
     def ndarray(self) -> "NoArray":
         return type(self)
@@ -68,10 +80,18 @@ class NoArray(AbstractArray):
     def std(array: Any):
         raise NotImplementedError
 
+    @staticmethod
+    def stats(array: Any, stride: int = 1):
+        raise NotImplementedError
+
     @staticmethod
     def all(array: Any):
         raise NotImplementedError
 
+    @staticmethod
+    def array_equal(lhs: Any, rhs: Any) -> bool:
+        raise NotImplementedError
+
     @staticmethod
     def is_floating(array: Any):
         raise NotImplementedError
@@ -14,6 +14,8 @@
 
 from __future__ import annotations
 
+from typing import Any
+
 import numpy as np
 
 from pytreeclass._src.backend.arraylib.base import AbstractArray
@@ -24,6 +26,26 @@ class NumpyArray(AbstractArray):
     def tobytes(array: np.ndarray) -> bytes:
         return np.array(array).tobytes()
 
+    @staticmethod
+    def tobuffer(array: np.ndarray) -> memoryview:
+        # flat bytes view of the array, copies only non-contiguous arrays
+        array = np.ascontiguousarray(array)
+        return memoryview(array.reshape(-1).view(np.uint8))
+
+    @staticmethod
+    def version(array: np.ndarray) -> int | None:
+        # numpy arrays does not track in-place updates, thus only read-only
+        # arrays (and their bases) are considered unchanged (version 0)
+        while isinstance(array, np.ndarray):
+            if array.flags.writeable:
+                return None
+            array = array.base
+        return 0
+
+    @staticmethod
+    def is_mutable(array: np.ndarray) -> bool:
+        return NumpyArray.version(array) is None
+
     @property
     def ndarray(self) -> type[np.ndarray]:
         return np.ndarray
@@ -68,10 +90,30 @@ class NumpyArray(AbstractArray):
     def std(array: np.ndarray) -> np.ndarray:
         return np.std(array)
 
+    @staticmethod
+    def stats(array: np.ndarray, stride: int = 1) -> tuple[Any, Any, Any, Any]:
+        # min, max, mean and std of every `stride`-th element, the mean is
+        # reused for the std. `flat` copies only the sampled elements
+        array = np.asarray(array) if stride == 1 else array.flat[::stride]
+        mean = np.mean(array)
+        deviation = array - mean
+        np.multiply(deviation, deviation, out=deviation)
+        return np.min(array), np.max(array), mean, np.sqrt(np.mean(deviation))
+
     @staticmethod
     def all(array: np.ndarray) -> np.ndarray:
         return np.all(array)
 
+    @staticmethod
+    def array_equal(lhs: np.ndarray, rhs: np.ndarray) -> bool:
+        # compare in chunks to bound the size of the temporary boolean array
+        # and to exit early on the first mismatching chunk
+        lhs, rhs, size = np.ravel(lhs), np.ravel(rhs), 2**18
+        for i in range(0, lhs.size, size):
+            if not np.array_equal(lhs[i : i + size], rhs[i : i + size]):
+                return False
+        return True
+
     @staticmethod
     def is_floating(array: np.ndarray) -> bool:
         return np.issubdtype(array.dtype, np.floating)
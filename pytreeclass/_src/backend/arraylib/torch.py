@@ -14,6 +14,8 @@
 
 from __future__ import annotations
 
+from typing import Any
+
 import numpy as np
 import torch
 
@@ -29,6 +31,21 @@ class TorchArray(AbstractArray):
     def tobytes(array: torch.Tensor) -> bytes:
         return np.from_dlpack(array).tobytes()
 
+    @staticmethod
+    def tobuffer(array: torch.Tensor) -> memoryview:
+        # zero-copy for contiguous cpu tensors
+        array = np.ascontiguousarray(np.from_dlpack(array))
+        return memoryview(array.reshape(-1).view(np.uint8))
+
+    @staticmethod
+    def version(array: torch.Tensor) -> int:
+        # incremented by in-place operations
+        return array._version
+
+    @staticmethod
+    def is_mutable(array: torch.Tensor) -> bool:
+        return True
+
     @property
     def ndarray(self) -> type[torch.Tensor]:
         return torch.Tensor
@@ -73,10 +90,27 @@ class TorchArray(AbstractArray):
     def std(array: torch.Tensor) -> torch.Tensor:
         return torch.std(array)
 
+    @staticmethod
+    def stats(array: torch.Tensor, stride: int = 1) -> tuple[Any, Any, Any, Any]:
+        # fused min/max and std/mean reductions, transferred to the host
+        # together (min/max keep the array dtype)
+        array = array if stride == 1 else array.reshape(-1)[::stride]
+        low, high = torch.aminmax(array)
+        std, mean = torch.std_mean(
+            array if array.dtype in floatings else array.double()
+        )
+        low, high = torch.stack([low, high]).tolist()
+        mean, std = torch.stack([mean, std]).tolist()
+        return low, high, mean, std
+
     @staticmethod
     def all(array: torch.Tensor) -> torch.Tensor:
         return torch.all(array)
 
+    @staticmethod
+    def array_equal(lhs: torch.Tensor, rhs: torch.Tensor) -> bool:
+        return torch.equal(lhs, rhs)
+
     @staticmethod
     def is_floating(array: torch.Tensor) -> bool:
         return array.dtype in floatings
@@ -17,9 +17,35 @@
 from __future__ import annotations
 
 import abc
+import asyncio
+import atexit
+import contextlib
 import os
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
-from typing import Any, Callable, Hashable, Iterable, Literal, Tuple, TypedDict, TypeVar
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import (
+    BrokenExecutor,
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Hashable,
+    Iterable,
+    Literal,
+    MutableMapping,
+    NamedTuple,
+    Tuple,
+    TypedDict,
+    TypeVar,
+)
 
 namespace: str = os.environ.get("PYTREECLASS_NAMESPACE", "PYTREECLASS")
 
@@ -29,15 +55,212 @@ KeyEntry = TypeVar("KeyEntry", bound=Hashable)
 KeyPath = Tuple[KeyEntry, ...]
 KeyPathLeaf = Tuple[KeyPath, Leaf]
 pool_map = dict(thread=ThreadPoolExecutor, process=ProcessPoolExecutor)
+# max number of attribute layouts cached per registered treeclass
+MAX_LAYOUTS: int = 128
 
 
-class ParallelConfig(TypedDict):
+class ParallelConfig(TypedDict, total=False):
     max_workers: int | None
     kind: Literal["thread", "process"]
+    chunksize: int | None
+    executor: Executor | None
+    chunking: Literal["count", "cost"] | Callable[[tuple[Any, ...]], float]
+    shared_memory: bool
 
 
-def raise_future_execption(future):
-    raise future.exception()
+# persistent executors keyed by (kind, max_workers). an executor is created on
+# the first parallel map with its config and reused by the next parallel maps,
+# and all the executors are shut down on interpreter exit.
+_executors: dict[tuple[str, int | None], Executor] = {}
+_executors_lock = threading.Lock()
+# marks the threads running a chunk of a parallel map. nested parallel maps
+# (e.g. a mapped function that maps in parallel) run serially in the worker
+# instead of waiting on the workers of the same executor.
+_worker_state = threading.local()
+
+
+def get_executor(
+    kind: Literal["thread", "process"] = "thread",
+    max_workers: int | None = None,
+) -> Executor:
+    """Return the persistent executor of ``kind`` with ``max_workers`` workers."""
+    with _executors_lock:
+        if (executor := _executors.get((kind, max_workers))) is None:
+            if kind == "process":
+                # the workers share the resource tracker of this process, thus
+                # shared memory blocks created by a worker and unlinked by this
+                # process (or vice versa) are tracked once.
+                resource_tracker.ensure_running()
+            executor = _executors[(kind, max_workers)] = pool_map[kind](max_workers)
+        return executor
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """Shut down the persistent executors, new ones are created on demand."""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
+
+
+atexit.register(shutdown_executors)
+
+
+def map_chunk(func: Callable[..., Any], chunk: list[tuple[Any, ...]]) -> list[Any]:
+    # run in the worker of the executor for a chunk of the flat arguments
+    _worker_state.active = True
+    try:
+        return [func(*args) for args in chunk]
+    finally:
+        _worker_state.active = False
+
+
+# the cost of a function call in bytes of array data, i.e. the cost of a leaf
+# is `CALL_COST + nbytes` for array leaves and `CALL_COST` for other leaves.
+CALL_COST: int = 1024
+
+
+def args_cost(args: tuple[Any, ...]) -> int:
+    """Estimate the cost of calling a function on ``args`` from the array sizes."""
+    # import on call as the array backend is resolved after the tree backend
+    from pytreeclass._src.backend import arraylib
+
+    cost = CALL_COST
+    for arg in args:
+        if isinstance(arg, arraylib.ndarray):
+            cost += int(arraylib.nbytes(arg))
+    return cost
+
+
+def count_chunks(size: int, chunksize: int) -> list[range]:
+    # chunks of `chunksize` consecutive indices
+    return [range(i, min(i + chunksize, size)) for i in range(0, size, chunksize)]
+
+
+def cost_chunks(costs: list[float], num_chunks: int) -> list[list[int]]:
+    # group the indices into chunks of balanced total cost. the indices are
+    # visited in decreasing cost order (longest processing time first), thus
+    # the costly leaves are in the first chunks, submitted and run first, and
+    # the cheap leaves are grouped in the last chunks to balance the load.
+    order = sorted(range(len(costs)), key=costs.__getitem__, reverse=True)
+    target = sum(costs) / num_chunks
+    chunks: list[list[int]] = []
+    chunk: list[int] = []
+    total = 0.0
+    for index in order:
+        chunk += [index]
+        if (total := total + costs[index]) >= target:
+            chunks += [chunk]
+            chunk, total = [], 0.0
+    return chunks + [chunk] if chunk else chunks
+
+
+# numpy arrays larger than this size in bytes are passed to/from the process
+# pool workers through shared memory instead of pickling their data.
+SHARED_MEMORY_THRESHOLD: int = 2**20
+
+
+class SharedArray(NamedTuple):
+    # a picklable reference to a numpy array stored in a shared memory block
+    name: str
+    shape: tuple[int, ...]
+    dtype: Any
+
+
+def is_shareable(value: Any) -> bool:
+    # numpy is not imported if the value can not be a numpy array
+    if (np := sys.modules.get("numpy")) is None or not isinstance(value, np.ndarray):
+        return False
+    return value.nbytes >= SHARED_MEMORY_THRESHOLD and not value.dtype.hasobject
+
+
+def share_array(array: Any) -> tuple[SharedArray, SharedMemory]:
+    # copy the array to a new shared memory block
+    import numpy as np
+
+    block = SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+    return SharedArray(block.name, array.shape, array.dtype), block
+
+
+def open_shared_array(shared: SharedArray) -> tuple[Any, SharedMemory]:
+    # attach to the shared memory block and return a view of the array
+    import numpy as np
+
+    block = SharedMemory(name=shared.name)
+    return np.ndarray(shared.shape, shared.dtype, buffer=block.buf), block
+
+
+def call_shared(func: Callable[..., Any], args: tuple[Any, ...]) -> Any:
+    # call `func` in a worker process with the shared arrays of the parent
+    # process as arguments, and share the result array with the parent process
+    blocks: list[SharedMemory] = []
+
+    def load(arg: Any) -> Any:
+        if not isinstance(arg, SharedArray):
+            return arg
+        view, block = open_shared_array(arg)
+        blocks.append(block)
+        return view
+
+    try:
+        # the arguments views are released after the call
+        value = func(*[load(arg) for arg in args])
+
+        if is_shareable(value):
+            value, block = share_array(value)
+            block.close()
+        elif blocks and isinstance(value, sys.modules["numpy"].ndarray):
+            # the value can be a view of the arguments, copy before closing them
+            value = value.copy()
+    finally:
+        # the arguments blocks are closed even if `func` raised
+        for block in blocks:
+            try:
+                block.close()
+            except BufferError:
+                # a view of the block is still referenced, closed on garbage collection
+                pass
+    return value
+
+
+def map_shared_chunk(func: Callable[..., Any], chunk: list[tuple[Any, ...]]) -> list[Any]:
+    # same as `map_chunk`, but the large numpy arrays are passed through shared
+    # memory. the arguments are views of the blocks owned by the parent process
+    # and the results are copied to new blocks owned by the parent process.
+    _worker_state.active = True
+    values: list[Any] = []
+    try:
+        for args in chunk:
+            values += [call_shared(func, args)]
+        return values
+    except BaseException:
+        # the results of the chunk are lost, release their blocks before raising
+        for value in values:
+            if isinstance(value, SharedArray):
+                unlink_shared_array(value)
+        raise
+    finally:
+        _worker_state.active = False
+
+
+def unlink_shared_array(shared: SharedArray) -> None:
+    # release the shared memory block without loading the array
+    with contextlib.suppress(FileNotFoundError):
+        block = SharedMemory(name=shared.name)
+        block.close()
+        block.unlink()
+
+
+def load_shared_array(shared: SharedArray) -> Any:
+    # copy the array out of the shared memory block and release the block
+    view, block = open_shared_array(shared)
+    array = view.copy()
+    del view
+    block.close()
+    block.unlink()
+    return array
 
 
 def concurrent_map(
@@ -45,16 +268,306 @@ def concurrent_map(
     flat: Iterable[Any],
     max_workers: int | None = None,
     kind: Literal["thread", "process"] = "thread",
-) -> Iterable[Any]:
-    with (executor := pool_map[kind](max_workers)) as executor:
-        futures = [executor.submit(func, *args) for args in zip(*flat)]
+    chunksize: int | None = None,
+    executor: Executor | None = None,
+    chunking: Literal["count", "cost"] | Callable[[tuple[Any, ...]], float] = "count",
+    shared_memory: bool = False,
+) -> list[Any]:
+    args = list(zip(*flat))
+
+    if not args or getattr(_worker_state, "active", False):
+        # nothing to map, or a nested parallel map inside a worker
+        return [func(*arg) for arg in args]
+
+    if executor is None:
+        config = dict(
+            chunksize=chunksize, chunking=chunking, shared_memory=shared_memory
+        )
+        try:
+            executor = get_executor(kind, max_workers)
+            return concurrent_map(func, zip(*args), executor=executor, **config)
+        except BrokenExecutor:
+            # the workers of a persistent process pool are forked once, thus
+            # they miss the functions defined in `__main__` after the fork and
+            # break the pool on loading the task. the broken pool is dropped,
+            # so retry once on a new pool forked from the current `__main__`.
+            if kind != "process":
+                raise
+            executor = get_executor(kind, max_workers)
+            return concurrent_map(func, zip(*args), executor=executor, **config)
+
+    # few chunks per worker to balance the load with a small overhead
+    workers = getattr(executor, "_max_workers", None) or os.cpu_count() or 1
+    num_chunks = workers * 4
+
+    if chunking == "count":
+        chunksize = -(-len(args) // num_chunks) if chunksize is None else chunksize
+        if chunksize < 1:
+            raise ValueError(f"`chunksize` must be a positive int, got {chunksize=}")
+        chunks: list[Iterable[int]] = count_chunks(len(args), chunksize)
+    elif chunking == "cost" or callable(chunking):
+        cost = args_cost if chunking == "cost" else chunking
+        chunks = cost_chunks([cost(arg) for arg in args], num_chunks)
+    else:
+        raise ValueError(f"Expected `count`, `cost` or callable, got {chunking=}")
+
+    # shared memory blocks of the arguments owned by this process
+    blocks: list[SharedMemory] = []
+    worker = map_chunk
+
+    if shared_memory and isinstance(executor, ProcessPoolExecutor):
+        # pass the large numpy arrays through shared memory instead of pickling
+        worker = map_shared_chunk
+
+        def share(arg: Any) -> Any:
+            if not is_shareable(arg):
+                return arg
+            shared, block = share_array(arg)
+            blocks.append(block)
+            return shared
+
+        args = [tuple(map(share, arg)) for arg in args]
+
+    submit = executor.submit
+    futures = [submit(worker, func, [args[i] for i in chunk]) for chunk in chunks]
+    values: list[Any] = [None] * len(args)
+    loaded = 0
 
-    return [
-        future.result()
-        if future.exception() is None
-        else raise_future_execption(future)
-        for future in futures
-    ]
+    try:
+        for chunk, future in zip(chunks, futures):
+            for index, value in zip(chunk, future.result()):
+                if worker is map_shared_chunk and isinstance(value, SharedArray):
+                    value = load_shared_array(value)
+                values[index] = value
+            loaded += 1
+        return values
+    except BrokenExecutor:
+        # drop the broken executor to be recreated by the next parallel map
+        with _executors_lock:
+            for key, value in list(_executors.items()):
+                if value is executor:
+                    del _executors[key]
+        raise
+    finally:
+        # cancel the pending chunks if a chunk raised
+        for future in futures:
+            future.cancel()
+        for block in blocks:
+            block.close()
+            block.unlink()
+        if worker is map_shared_chunk:
+            # release the shared results of the chunks that are not loaded
+            for future in futures[loaded:]:
+                if not future.cancelled() and future.exception() is None:
+                    for value in future.result():
+                        if isinstance(value, SharedArray):
+                            unlink_shared_array(value)
+
+
+async def async_concurrent_map(
+    func: Callable[..., Awaitable[Any]],
+    flat: Iterable[Any],
+    max_concurrency: int | None = None,
+) -> list[Any]:
+    # run the coroutines of `func` on the flat arguments concurrently in the
+    # running event loop, with at most `max_concurrency` running at a time.
+    if max_concurrency is not None and max_concurrency < 1:
+        raise ValueError(f"`max_concurrency` must be positive, got {max_concurrency=}")
+
+    semaphore = None if max_concurrency is None else asyncio.Semaphore(max_concurrency)
+
+    async def run(*args: Any) -> Any:
+        if semaphore is None:
+            return await func(*args)
+        async with semaphore:
+            return await func(*args)
+
+    tasks = [asyncio.ensure_future(run(*args)) for args in zip(*flat)]
+
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        # cancel the pending coroutines if a coroutine raised
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class LRUCache:
+    # bounded mapping that evicts the least recently used entry once full.
+    # used to store data derived from the tree structure, keyed by the treedef.
+    __slots__ = ["maxsize", "data", "lock", "hits", "misses"]
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.data: OrderedDict[Hashable, Any] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self.lock:
+            if key in self.data:
+                self.hits += 1
+                self.data.move_to_end(key)
+                return self.data[key]
+            self.misses += 1
+            return default
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            if len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.data.clear()
+            self.hits = self.misses = 0
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.data))
+
+
+# slot name -> member descriptor of the slot storage of the class instances
+_slot_members_cache: MutableMapping[type, dict[str, Any]] = weakref.WeakKeyDictionary()
+
+
+def slot_members(klass: type) -> dict[str, Any]:
+    """Return the member descriptors of the slots of ``klass`` and its bases."""
+    if (members := _slot_members_cache.get(klass)) is not None:
+        return members
+    members = {}
+    for base in reversed(klass.__mro__):
+        names = vars(base).get("__slots__", ())
+        for name in (names,) if isinstance(names, str) else names:
+            if name in ("__dict__", "__weakref__"):
+                continue
+            if name.startswith("__") and not name.endswith("__"):
+                # private slot names are mangled
+                name = f"_{base.__name__.lstrip('_')}{name}"
+            # the member can be wrapped by a descriptor with the same name,
+            # e.g. the fields of `autoinit(slots=True)` classes
+            member = vars(base)[name]
+            members[name] = getattr(member, "member", member)
+    _slot_members_cache[klass] = members
+    return members
+
+
+def instance_vars(tree: Any) -> dict[str, Any]:
+    """Return the attributes of ``tree`` stored in its slots and ``__dict__``."""
+    if not (members := slot_members(type(tree))):
+        return vars(tree)
+    values = {}
+    for name, member in members.items():
+        try:
+            values[name] = member.__get__(tree)
+        except AttributeError:
+            # unset slot
+            continue
+    values.update(getattr(tree, "__dict__", {}))
+    return values
+
+
+def update_instance_vars(tree: Tree, items: Iterable[tuple[str, Any]]) -> Tree:
+    """Write the attributes to the slots and ``__dict__`` of ``tree`` directly."""
+    if not (members := slot_members(type(tree))):
+        vars(tree).update(items)
+        return tree
+    for name, value in items:
+        if (member := members.get(name)) is None:
+            vars(tree)[name] = value
+        else:
+            member.__set__(tree, value)
+    return tree
+
+
+def build_treeclass_rules(klass: type[Tree], attribute_key: Callable[[str], Any]):
+    """Build the ``flatten`` and ``unflatten`` rules of a treeclass.
+
+    ``flatten(tree)`` returns a tuple of (attribute values, attribute names,
+    attribute key entries) and ``unflatten(names, values)`` constructs an
+    instance of ``klass`` from the names and values.
+    """
+    # attribute layout -> (keys, entries), instances of the same class
+    # mostly share one layout, so the key tuple and the key entries are built
+    # once and reused across flattens. dynamically added attributes produce
+    # a new layout and are cached up to `MAX_LAYOUTS` entries.
+    layouts: dict[tuple[str, ...], tuple[tuple[str, ...], tuple[Any, ...]]] = {}
+    members = slot_members(klass)
+    new = getattr(object, "__new__")
+
+    def get_layout(keys: tuple[str, ...]) -> tuple[tuple[str, ...], tuple[Any, ...]]:
+        if (layout := layouts.get(keys)) is None:
+            layout = (keys, tuple(attribute_key(key) for key in keys))
+            if len(layouts) < MAX_LAYOUTS:
+                layouts[keys] = layout
+        return layout
+
+    if not members:
+        # attributes are stored in the instance `__dict__`
+        def unflatten(keys: tuple[str, ...], leaves: Iterable[Any]) -> Tree:
+            vars(tree := new(klass)).update(zip(keys, leaves))
+            return tree
+
+        def flatten(tree: Tree):
+            keys = tuple(dynamic := vars(tree))
+            return (tuple(dynamic.values()), *get_layout(keys))
+
+        return flatten, unflatten
+
+    # attributes are stored in slots, and optionally in the instance `__dict__`
+    # if a base class does not define `__slots__`
+    def unflatten(keys: tuple[str, ...], leaves: Iterable[Any]) -> Tree:
+        return update_instance_vars(new(klass), zip(keys, leaves))
+
+    if getattr(klass, "__dictoffset__", 0) != 0:
+
+        def flatten(tree: Tree):
+            keys = tuple(dynamic := instance_vars(tree))
+            return (tuple(dynamic.values()), *get_layout(keys))
+
+        return flatten, unflatten
+
+    # fixed layout, all attributes are stored in slots. generate the flatten and
+    # unflatten rules that read/write the slots of the layout without loops.
+    layout = get_layout(tuple(members))
+    refmap: dict[str, Any] = dict(klass=klass, new=new, layout=layout)
+    refmap.update(instance_vars=instance_vars, get_layout=get_layout)
+    refmap.update(update_instance_vars=update_instance_vars)
+    getters: list[str] = []
+    setters: list[str] = ["tree=new(klass)"]
+    names: list[str] = []
+
+    for i, member in enumerate(members.values()):
+        refmap[f"get{i}"], refmap[f"set{i}"] = member.__get__, member.__set__
+        getters += [f"get{i}(tree)"]
+        setters += [f"set{i}(tree,v{i})"]
+        names += [f"v{i}"]
+
+    code = "def flatten(tree):"
+    code += "\n\ttry:"
+    code += f"\n\t\treturn ({','.join(getters)},),*layout"
+    code += "\n\texcept AttributeError:"
+    # some slots are not set
+    code += "\n\t\tdynamic=instance_vars(tree)"
+    code += "\n\t\treturn (tuple(dynamic.values()),*get_layout(tuple(dynamic)))"
+    code += "\ndef unflatten(keys,leaves):"
+    code += "\n\tif keys is not layout[0]:"
+    code += "\n\t\treturn update_instance_vars(new(klass),zip(keys,leaves))"
+    code += f"\n\t{','.join(names)}, = leaves"
+    code += f"\n\t{';'.join(setters)}"
+    code += "\n\treturn tree"
+
+    exec(code, refmap)
+    return refmap["flatten"], refmap["unflatten"]
 
 
 class AbstractTreeLib(abc.ABC):
@@ -82,6 +595,17 @@ class AbstractTreeLib(abc.ABC):
     ) -> Any:
         ...
 
+    @staticmethod
+    @abc.abstractmethod
+    async def async_tree_map(
+        func: Callable[..., Awaitable[Any]],
+        tree: Any,
+        *rest: Any,
+        is_leaf: Callable[[Any], bool] | None = None,
+        max_concurrency: int | None = None,
+    ) -> Any:
+        ...
+
     @staticmethod
     @abc.abstractmethod
     def tree_flatten(
@@ -129,3 +653,9 @@ class AbstractTreeLib(abc.ABC):
     @abc.abstractmethod
     def dict_key(key: Hashable) -> Any:
         ...
+
+    @staticmethod
+    @abc.abstractmethod
+    def is_structure_keyed(treedef: Any) -> bool:
+        # whether the leaves paths are determined by the tree structure alone
+        ...
@@ -15,19 +15,75 @@
 from __future__ import annotations
 
 import dataclasses as dc
-from typing import Any, Callable, Hashable, Iterable
+import weakref
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Hashable, Iterable, MutableSet
 
 import jax.tree_util as jtu
 
 from pytreeclass._src.backend.treelib.base import (
     AbstractTreeLib,
+    KeyPath,
     KeyPathLeaf,
+    LRUCache,
     ParallelConfig,
     Tree,
+    async_concurrent_map,
+    build_treeclass_rules,
     concurrent_map,
 )
 
 
+# leaves paths keyed by the treedef. the paths of builtin containers and
+# treeclasses depend only on the tree structure, thus repeated path maps/flattens
+# of trees with the same structure (e.g. `.at` indexing of a model in a training
+# loop) use the faster `tree_flatten` and reuse the paths of the first call
+# instead of `tree_flatten_with_path`. treedefs with other nodes are marked as
+# uncacheable, as custom nodes can compute their keys from the children data.
+_paths_cache = LRUCache(maxsize=256)
+_uncacheable = object()
+
+# node types whose keys are determined by the node type and aux data
+_structure_keyed_types = (list, tuple, dict, type(None), OrderedDict, defaultdict)
+_treeclass_types: MutableSet[type] = weakref.WeakSet()
+
+
+def is_structure_keyed(treedef: jtu.PyTreeDef) -> bool:
+    stack = [treedef]
+    while stack:
+        node = stack.pop()
+        if (node_data := node.node_data()) is not None:
+            kind, _ = node_data
+            if not (
+                kind in _structure_keyed_types
+                or kind in _treeclass_types
+                or (issubclass(kind, tuple) and hasattr(kind, "_fields"))
+            ):
+                return False
+        stack += node.children()
+    return True
+
+
+def tree_flatten_with_path(
+    tree: Any,
+    is_leaf: Callable[[Any], bool] | None = None,
+) -> tuple[tuple[KeyPath, ...], list[Any], jtu.PyTreeDef]:
+    leaves, treedef = jtu.tree_flatten(tree, is_leaf=is_leaf)
+    try:
+        paths = _paths_cache.get(treedef)
+    except TypeError:
+        # unhashable node data
+        paths = _uncacheable
+    if paths is None or paths is _uncacheable:
+        path_leaves, _ = jtu.tree_flatten_with_path(tree, is_leaf=is_leaf)
+        if paths is None:
+            cached = is_structure_keyed(treedef)
+            paths = tuple(path for path, _ in path_leaves)
+            _paths_cache[treedef] = paths if cached else _uncacheable
+        else:
+            paths = tuple(path for path, _ in path_leaves)
+    return paths, leaves, treedef
+
 
 class JaxTreeLib(AbstractTreeLib):
     @staticmethod
@@ -53,13 +109,26 @@ class JaxTreeLib(AbstractTreeLib):
         is_leaf: Callable[[Any], bool] | None = None,
         is_parallel: bool | ParallelConfig = False,
     ) -> Any:
-        leaves, treedef = jtu.tree_flatten_with_path(tree, is_leaf)
-        flat: list[Any] = list(zip(*leaves)) + [treedef.flatten_up_to(r) for r in rest]
+        paths, leaves, treedef = tree_flatten_with_path(tree, is_leaf)
+        flat: list[Any] = [paths, leaves] + [treedef.flatten_up_to(r) for r in rest]
         if not is_parallel:
             return jtu.tree_unflatten(treedef, [func(*args) for args in zip(*flat)])
         config = dict() if is_parallel is True else is_parallel
         return jtu.tree_unflatten(treedef, concurrent_map(func, flat, **config))
 
+    @staticmethod
+    async def async_tree_map(
+        func: Callable[..., Awaitable[Any]],
+        tree: Any,
+        *rest: Any,
+        is_leaf: Callable[[Any], bool] | None = None,
+        max_concurrency: int | None = None,
+    ) -> Any:
+        leaves, treedef = jtu.tree_flatten(tree, is_leaf)
+        flat = [leaves] + [treedef.flatten_up_to(r) for r in rest]
+        values = await async_concurrent_map(func, flat, max_concurrency)
+        return jtu.tree_unflatten(treedef, values)
+
     @staticmethod
     def tree_flatten(
         tree: Any,
@@ -74,7 +143,8 @@ class JaxTreeLib(AbstractTreeLib):
         *,
         is_leaf: Callable[[Any], bool] | None = None,
     ) -> tuple[Iterable[KeyPathLeaf], jtu.PyTreeDef]:
-        return jtu.tree_flatten_with_path(tree, is_leaf=is_leaf)
+        paths, leaves, treedef = tree_flatten_with_path(tree, is_leaf)
+        return list(zip(paths, leaves)), treedef
 
     @staticmethod
     def tree_unflatten(treedef: jtu.PyTreeDef, leaves: Iterable[Any]) -> Any:
@@ -82,24 +152,23 @@ class JaxTreeLib(AbstractTreeLib):
 
     @staticmethod
     def register_treeclass(klass: type[Tree]) -> None:
-        def unflatten(keys: tuple[str, ...], leaves: tuple[Any, ...]) -> Tree:
-            vars(tree := getattr(object, "__new__")(klass)).update(zip(keys, leaves))
-            return tree
+        flatten_rule, unflatten = build_treeclass_rules(klass, jtu.GetAttrKey)
 
         def flatten(tree: Tree) -> tuple[tuple[Any, ...], tuple[str, ...]]:
-            return tuple((dynamic := vars(tree)).values()), tuple(dynamic.keys())
+            leaves, keys, _ = flatten_rule(tree)
+            return leaves, keys
 
         def flatten_with_keys(tree: Tree):
-            dynamic = dict(vars(tree))
-            for idx, key in enumerate(vars(tree)):
-                dynamic[key] = (jtu.GetAttrKey(key), dynamic[key])
-            return tuple(dynamic.values()), tuple(dynamic.keys())
+            leaves, keys, entries = flatten_rule(tree)
+            return tuple(zip(entries, leaves)), keys
 
         jtu.register_pytree_with_keys(klass, flatten_with_keys, unflatten, flatten)
+        _treeclass_types.add(klass)
 
     @staticmethod
     def register_static(klass: type[Tree]) -> None:
         jtu.register_pytree_node(klass, lambda x: ((), x), lambda x, _: x)
+        _treeclass_types.add(klass)
 
     @staticmethod
     def attribute_key(name: str) -> jtu.GetAttrKey:
@@ -111,4 +180,15 @@ class JaxTreeLib(AbstractTreeLib):
 
     @staticmethod
     def dict_key(key: Hashable) -> jtu.DictKey:
-        return jtu.DictKey(key)
\ No newline at end of file
+        return jtu.DictKey(key)
+
+    @staticmethod
+    def is_structure_keyed(treedef: jtu.PyTreeDef) -> bool:
+        # reuse the verdict of the paths cache if the treedef is flattened
+        try:
+            paths = _paths_cache.get(treedef)
+        except TypeError:
+            return False
+        if paths is None:
+            return is_structure_keyed(treedef)
+        return paths is not _uncacheable
@@ -15,7 +15,7 @@
 from __future__ import annotations
 
 import dataclasses as dc
-from typing import Any, Callable, Hashable, Iterable
+from typing import Any, Awaitable, Callable, Hashable, Iterable
 
 import optree as ot
 
@@ -24,6 +24,8 @@ from pytreeclass._src.backend.treelib.base import (
     KeyPathLeaf,
     ParallelConfig,
     Tree,
+    async_concurrent_map,
+    build_treeclass_rules,
     concurrent_map,
     namespace,
 )
@@ -76,6 +78,19 @@ class OpTreeTreeLib(AbstractTreeLib):
         config = dict() if is_parallel is True else is_parallel
         return ot.tree_unflatten(treedef, concurrent_map(func, flat, **config))
 
+    @staticmethod
+    async def async_tree_map(
+        func: Callable[..., Awaitable[Any]],
+        tree: Any,
+        *rest: Any,
+        is_leaf: Callable[[Any], bool] | None = None,
+        max_concurrency: int | None = None,
+    ) -> Any:
+        leaves, treedef = ot.tree_flatten(tree, is_leaf, namespace=namespace)
+        flat = [leaves] + [treedef.flatten_up_to(r) for r in rest]
+        values = await async_concurrent_map(func, flat, max_concurrency)
+        return ot.tree_unflatten(treedef, values)
+
     @staticmethod
     def tree_flatten(
         tree: Any,
@@ -100,16 +115,7 @@ class OpTreeTreeLib(AbstractTreeLib):
 
     @staticmethod
     def register_treeclass(klass: type[Tree]) -> None:
-        def unflatten(keys: tuple[str, ...], leaves: tuple[Any, ...]) -> Tree:
-            vars(tree := getattr(object, "__new__")(klass)).update(zip(keys, leaves))
-            return tree
-
-        def flatten(tree: Tree):
-            dynamic = dict(vars(tree))
-            keys = tuple(dynamic.keys())
-            entries = tuple(GetAttrKey(k) for _, k in enumerate(keys))
-            return (tuple(dynamic.values()), keys, entries)
-
+        flatten, unflatten = build_treeclass_rules(klass, GetAttrKey)
         ot.register_pytree_node(klass, flatten, unflatten, namespace=namespace)
 
     @staticmethod
@@ -132,3 +138,8 @@ class OpTreeTreeLib(AbstractTreeLib):
     @staticmethod
     def dict_key(key: Hashable) -> DictKey:
         return DictKey(key)
+
+    @staticmethod
+    def is_structure_keyed(treedef: ot.PyTreeDef) -> bool:
+        # the leaves paths are computed from the treespec entries
+        return True
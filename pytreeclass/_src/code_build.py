@@ -32,13 +32,27 @@
 from __future__ import annotations
 
 import functools as ft
+import inspect
 import sys
+import weakref
 from collections import defaultdict
 from collections.abc import Callable, MutableMapping, MutableSequence, MutableSet
-from typing import Any, Literal, Mapping, Sequence, TypeVar, Union, get_args
+from typing import (
+    Any,
+    Dict,
+    Literal,
+    Mapping,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+    get_args,
+)
 
 from typing_extensions import dataclass_transform
 
+from pytreeclass._src.backend.treelib.base import instance_vars, update_instance_vars
+
 T = TypeVar("T")
 PyTree = Any
 EllipsisType = type(Ellipsis)
@@ -139,7 +153,12 @@ class Field:
         """Replace the field attributes."""
         # define a `replace` method similar to `dataclasses.replace` or namedtuple
         # to allow the user to replace the field attributes.
-        return type(self)(**{k: kwargs.get(k, getattr(self, k)) for k in slots(Field)})
+        kwargs = {k: kwargs.get(k, getattr(self, k)) for k in slots(Field)}
+        klass = type(self)
+        if klass in (Field, CallbackField, SlotField):
+            # the descriptor type depends on the callbacks
+            klass = field_type(kwargs["on_setattr"], kwargs["on_getattr"])
+        return klass(**kwargs)
 
     def pipe(self, funcs: Sequence[Callable[[Any], Any]], value: Any):
         """Apply a sequence of functions on the field value."""
@@ -159,7 +178,9 @@ class Field:
     def __repr__(self) -> str:
         """Return the string representation of the field."""
         attrs = [f"{k}={getattr(self, k)!r}" for k in slots(Field)]
-        return f"{type(self).__name__}({', '.join(attrs)})"
+        klass = type(self)
+        name = "Field" if klass in (CallbackField, SlotField) else klass.__name__
+        return f"{name}({', '.join(attrs)})"
 
     def __set_name__(self, owner, name: str) -> None:
         """Set the field name."""
@@ -169,7 +190,7 @@ class Field:
         # in case the user uses `field` as a descriptor without annotating the class
         if "__annotations__" in (variables := vars(owner)):
             # set the type to the type hint of the attribute if it exists
-            self.type = variables.get(name, NULL)
+            self.type = variables["__annotations__"].get(name, NULL)
 
     def __get__(self: T, instance, _) -> T | Any:
         """Return the field value."""
@@ -177,6 +198,14 @@ class Field:
             return self
         return self.pipe(self.on_getattr, vars(instance)[self.name])
 
+
+class CallbackField(Field):
+    # `Field` is a non-data descriptor, i.e. the instance value shadows the
+    # descriptor, so reading or writing a field without callbacks does not call
+    # the descriptor methods. `CallbackField` is a data descriptor, i.e. takes
+    # precedence over the instance value, to apply the field callbacks.
+    __slots__ = []
+
     def __set__(self: T, instance, value) -> None:
         """Set the field value."""
         vars(instance)[self.name] = self.pipe(self.on_setattr, value)
@@ -186,6 +215,38 @@ class Field:
         del vars(instance)[self.name]
 
 
+class SlotField(Field):
+    # `SlotField` is a data descriptor that wraps the member descriptor of the
+    # slot with the same name, i.e. the field value is stored in the instance
+    # slots instead of the instance `__dict__`. used by `autoinit(slots=True)`.
+    __slots__ = ["member"]
+
+    def __init__(self, *, member: Any, **kwargs):
+        super().__init__(**kwargs)
+        self.member = member
+
+    def __get__(self: T, instance, _) -> T | Any:
+        """Return the field value."""
+        if instance is None:
+            return self
+        return self.pipe(self.on_getattr, self.member.__get__(instance))
+
+    def __set__(self: T, instance, value) -> None:
+        """Set the field value."""
+        self.member.__set__(instance, self.pipe(self.on_setattr, value))
+
+    def __delete__(self: T, instance) -> None:
+        """Delete the field value."""
+        self.member.__delete__(instance)
+
+
+def field_type(
+    on_setattr: Sequence[Callable[[Any], Any]],
+    on_getattr: Sequence[Callable[[Any], Any]],
+) -> type[Field]:
+    return CallbackField if (on_setattr or on_getattr) else Field
+
+
 def field(
     *,
     default: Any = NULL,
@@ -337,7 +398,7 @@ def field(
         if not isinstance(func, Callable):
             raise TypeError(f"Non-callable {func=} provided to `field` on_getattr")
 
-    return Field(
+    return field_type(on_setattr, on_getattr)(
         default=default,
         init=init,
         repr=repr,
@@ -349,7 +410,30 @@ def field(
     )
 
 
+# field maps and fields of classes keyed by the class. the cache is cleared
+# when a class is decorated with `autoinit` or an excluded type is registered.
+FieldMapEntry = Tuple[Dict[str, Field], Tuple[Field, ...]]
+_field_map_cache: MutableMapping[type, FieldMapEntry] = weakref.WeakKeyDictionary()
+
+
+def cached_field_map(klass: type) -> FieldMapEntry:
+    # return the cached field map and fields of the class
+    try:
+        return _field_map_cache[klass]
+    except KeyError:
+        field_map = _build_field_map(klass)
+        entry = _field_map_cache[klass] = (field_map, tuple(field_map.values()))
+        return entry
+    except TypeError:
+        # the class is not hashable or weak referenceable
+        return (field_map := _build_field_map(klass)), tuple(field_map.values())
+
+
 def build_field_map(klass: type) -> dict[str, Field]:
+    return dict(cached_field_map(klass)[0])
+
+
+def _build_field_map(klass: type) -> dict[str, Field]:
     field_map: dict[str, Field] = dict()
     excluded = set(["self", "__post_init__", "__annotations__"])
 
@@ -357,7 +441,7 @@ def build_field_map(klass: type) -> dict[str, Field]:
         return dict(field_map)
 
     for base in reversed(klass.__mro__[1:]):
-        field_map.update(build_field_map(base))
+        field_map.update(cached_field_map(base)[0])
 
     if (hint_map := vars(klass).get("__annotations__", NULL)) is NULL:
         return dict(field_map)
@@ -395,11 +479,14 @@ def fields(x: Any) -> tuple[Field, ...]:
         - If the class is not annotated, an empty tuple is returned.
         - The ``Field`` generation is cached for class and its bases.
     """
-    return tuple(build_field_map(x if isinstance(x, type) else type(x)).values())
+    return cached_field_map(x if isinstance(x, type) else type(x))[1]
 
 
 def convert_hints_to_fields(klass: type[T]) -> type[T]:
     # convert klass hints to `Field` objects for the current decorated class
+    # the fields of the class (and its subclasses) are changed, so the cached
+    # field maps are invalidated.
+    _field_map_cache.clear()
     if (hint_map := vars(klass).get("__annotations__", NULL)) is NULL:
         return klass
 
@@ -421,6 +508,36 @@ def check_duplicate_var_kind(field_map: dict[str, Field]) -> None:
             seen.add(field.kind)
 
 
+# `__setattr__` methods that are equivalent to writing to the instance `__dict__`
+# mapped to a check of whether the instance accepts the writes, e.g.
+# `TreeClass.__setattr__` that allows setting attributes only during
+# initialization. `None` marks setters that always accept the writes.
+_direct_setattr_registry: dict[Callable[..., None], Callable[[Any], bool] | None] = {
+    object.__setattr__: None
+}
+
+
+def build_direct_setter(klass: type, field: Field, value: str) -> str | None:
+    # generate a direct write to the instance `__dict__` (or the slot) for the
+    # field if `self.<name>=<value>` is equivalent to it, otherwise return None.
+    if klass.__setattr__ not in _direct_setattr_registry:
+        return None
+    descriptor = inspect.getattr_static(klass, field.name, None)
+    if not isinstance(descriptor, Field):
+        # the field attribute is overridden, e.g. by a property
+        return None
+    if descriptor.on_setattr:
+        # inline the `Field.__set__` logic to apply the callbacks
+        field_ref = f"refmap['{field.name}']"
+        value = f"{field_ref}.pipe({field_ref}.on_setattr,{value})"
+    if isinstance(descriptor, SlotField):
+        # write to the slot using the slot member setter
+        return f"refmap['{field.name}.__set__'](self,{value})"
+    if getattr(klass, "__dictoffset__", 0) == 0:
+        return None
+    return f"__vars__['{field.name}']={value}"
+
+
 def build_init_method(klass: type[T]) -> type[T]:
     field_map: dict[str, Field] = build_field_map(klass)
     check_duplicate_var_kind(field_map)
@@ -429,6 +546,21 @@ def build_init_method(klass: type[T]) -> type[T]:
     body: list[str] = []
     head: list[str] = ["self"]
     heads: dict[str, list[str]] = defaultdict(list)
+    # `fast_body` writes the fields to the instance `__dict__` (or slots) directly
+    # for instances of `klass` and falls back to `setattr` for overridden fields.
+    # `body` uses `setattr` for subclasses that might override `__setattr__`
+    fast_body: list[str] = []
+    fast = getattr(klass, "__dictoffset__", 0) != 0
+    fast_body += ["__vars__=self.__dict__"] if fast else []
+
+    # slot member setters of the fields stored in slots
+    setters: dict[str, Callable[[Any, Any], None]] = dict()
+
+    for name in field_map:
+        descriptor = inspect.getattr_static(klass, name, None)
+        if isinstance(descriptor, SlotField):
+            setters[f"{name}.__set__"] = descriptor.member.__set__
+            fast = True
 
     for field in field_map.values():
         if field.init:
@@ -437,6 +569,7 @@ def build_init_method(klass: type[T]) -> type[T]:
             # how to name the field in the constructor
             alias = field.alias or field.name
             body += [f"self.{field.name}={alias}"]
+            fast_body += [build_direct_setter(klass, field, alias) or body[-1]]
 
             if field.default is NULL:
                 # e.g. def __init__(.., x)
@@ -450,9 +583,12 @@ def build_init_method(klass: type[T]) -> type[T]:
                 # case for fields with `init=False` and no default value
                 # usaully declared in __post_init__
                 body += [f"self.{field.name}=refmap['{field.name}'].default"]
+                value = f"refmap['{field.name}'].default"
+                fast_body += [build_direct_setter(klass, field, value) or body[-1]]
 
     has_post = (key := "__post_init__") in vars(klass)
     body += [f"self.{key}()"] if has_post else ["pass"]
+    fast_body += body[-1:]
 
     # organize the arguments order:
     # (POS_ONLY, POS_OR_KW, VAR_POS, KW_ONLY, VAR_KW)
@@ -468,7 +604,19 @@ def build_init_method(klass: type[T]) -> type[T]:
     code = "def closure(refmap):\n"
     code += f"\tdef __init__({','.join(head)}):"
     field_map["__annotations__"] = hints
-
+    field_map.update(setters)  # type: ignore
+
+    if fast:
+        field_map["__class__"] = klass  # type: ignore
+        code += "\n\t\tif type(self) is refmap['__class__']"
+        if check := _direct_setattr_registry.get(klass.__setattr__):
+            # write directly only if `setattr` would accept the writes, e.g.
+            # not when `__init__` is called again on an initialized instance
+            field_map["__check__"] = check  # type: ignore
+            code += " and refmap['__check__'](self)"
+        code += ":"
+        code += f"\n\t\t\t{';'.join(fast_body)}"
+        code += "\n\t\t\treturn"
     code += f"\n\t\t{';'.join(body)}"
     code += f"\n\t__init__.__qualname__ = '{klass.__qualname__}.__init__'"
     code += f"\n\t__init__.__annotations__ = refmap['__annotations__']"
@@ -482,8 +630,73 @@ def build_init_method(klass: type[T]) -> type[T]:
     return klass
 
 
+def update_class_cell(value: Any, old: type, new: type) -> None:
+    # point the `__class__` cell of the methods defined in `old` to `new`
+    # to make the zero-argument `super()` work in the recreated class
+    value = getattr(value, "__func__", value)  # classmethod/staticmethod
+    if isinstance(value, property):
+        for func in (value.fget, value.fset, value.fdel):
+            update_class_cell(func, old, new)
+        return
+    if (code := getattr(inspect.unwrap(value), "__code__", None)) is None:
+        return
+    for name, cell in zip(code.co_freevars, inspect.unwrap(value).__closure__ or ()):
+        if name == "__class__" and cell.cell_contents is old:
+            cell.cell_contents = new
+
+
+def slots_getstate(self) -> dict[str, Any]:
+    return dict(instance_vars(self))
+
+
+def slots_setstate(self, state: dict[str, Any]) -> None:
+    update_instance_vars(self, state.items())
+
+
+def build_slots_class(klass: type[T]) -> type[T]:
+    # recreate the class with `__slots__` for the fields that are not stored in
+    # slots by a base class, similar to `dataclasses.dataclass(slots=True)`.
+    # the slots are wrapped by `SlotField` descriptors to keep the fields info.
+    if "__slots__" in vars(klass):
+        raise TypeError(f"`{klass.__name__}` already specifies `__slots__`.")
+
+    field_map = build_field_map(klass)
+    names = tuple(
+        name
+        for name in field_map
+        if not isinstance(inspect.getattr_static(klass, name, None), SlotField)
+    )
+    namespace = dict(vars(klass))
+
+    for name in ("__dict__", "__weakref__", *names):
+        namespace.pop(name, None)
+
+    # allow weak references if the bases do not, e.g. used to cache the hash
+    weakref_slot = not any(base.__weakrefoffset__ for base in klass.__bases__)
+    namespace["__slots__"] = names + (("__weakref__",) if weakref_slot else ())
+
+    # fields are written directly to the slots to bypass `__setattr__`
+    # as the instance can be immutable, e.g. `TreeClass` instances
+    namespace.setdefault("__getstate__", slots_getstate)
+    namespace.setdefault("__setstate__", slots_setstate)
+
+    new = type(klass)(klass.__name__, klass.__bases__, namespace)
+    # keep the qualified name of nested classes, e.g. to pickle the instances
+    new.__qualname__ = klass.__qualname__
+
+    for name in names:
+        kwargs = {key: getattr(field_map[name], key) for key in slots(Field)}
+        setattr(new, name, SlotField(member=vars(new)[name], **kwargs))
+
+    for value in namespace.values():
+        update_class_cell(value, klass, new)
+
+    _field_map_cache.clear()
+    return new
+
+
 @dataclass_transform(field_specifiers=(Field, field))
-def autoinit(klass: type[T]) -> type[T]:
+def autoinit(klass: type[T] | None = None, *, slots: bool = False) -> type[T]:
     """A class decorator that generates the ``__init__`` method from type hints.
 
     Similar to ``dataclasses.dataclass``, this decorator generates the ``__init__``
@@ -494,6 +707,14 @@ def autoinit(klass: type[T]) -> type[T]:
     can be used to apply functions on the field values during initialization,
     and/or support multiple argument kinds.
 
+    Args:
+        klass: The class to generate the ``__init__`` method for.
+        slots: If ``True``, the class is recreated with ``__slots__`` for its
+            fields, i.e. the field values are stored in the instance slots
+            instead of the instance ``__dict__``. This reduces the memory of
+            each instance, but disallows setting non-field attributes, unless
+            a base class has an instance ``__dict__``. Defaults to ``False``.
+
     Example:
         >>> import pytreeclass as tc
         >>> @tc.autoinit
@@ -512,6 +733,19 @@ def autoinit(klass: type[T]) -> type[T]:
         ...     kw_only_field: int = tc.field(default=1, kind="KW_ONLY")
         ...     pos_only_field: int = tc.field(default=2, kind="POS_ONLY")
 
+    Example:
+        >>> # store the fields in slots for a compact instance layout
+        >>> import pytreeclass as tc
+        >>> @tc.autoinit(slots=True)
+        ... class Particle(tc.TreeClass):
+        ...     x: float = 0.0
+        ...     v: float = 1.0
+        >>> particle = Particle()
+        >>> particle.at["x"].set(2.0)
+        Particle(x=2.0, v=1.0)
+        >>> hasattr(particle, "__dict__")
+        False
+
     Example:
         >>> # define a converter to apply ``abs`` on the field value
         >>> @tc.autoinit
@@ -577,16 +811,21 @@ def autoinit(klass: type[T]) -> type[T]:
         Traceback (most recent call last):
             ...
     """
-    return (
-        klass
-        # if the class already has a user-defined __init__ method
-        # then return the class as is without any modification
-        if "__init__" in vars(klass)
-        # first convert the current class hints to fields
-        # then build the __init__ method from the fields of the current class
-        # and any base classes that are decorated with `autoinit`
-        else build_init_method(convert_hints_to_fields(klass))
-    )
+    if klass is None:
+        # decorator with arguments, e.g. `@autoinit(slots=True)`
+        return ft.partial(autoinit, slots=slots)  # type: ignore
+
+    # if the class already has a user-defined __init__ method
+    # then return the class as is without any modification
+    if "__init__" in vars(klass):
+        return klass
+    # first convert the current class hints to fields
+    klass = convert_hints_to_fields(klass)
+    # then optionally store the fields in slots
+    klass = build_slots_class(klass) if slots else klass
+    # then build the __init__ method from the fields of the current class
+    # and any base classes that are decorated with `autoinit`
+    return build_init_method(klass)
 
 
 def register_excluded_type(klass: type, reason: str | None = None) -> None:
@@ -602,5 +841,8 @@ def register_excluded_type(klass: type, reason: str | None = None) -> None:
     def _(value) -> None:
         raise TypeError(f"{value=} is excluded from `autoinit`.{reason}")
 
+    # re-check the defaults of the cached field maps
+    _field_map_cache.clear()
+
 
 autoinit.register_excluded_type = register_excluded_type
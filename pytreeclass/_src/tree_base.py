@@ -17,12 +17,15 @@
 from __future__ import annotations
 
 import abc
-from typing import Any, Hashable, TypeVar
+import weakref
+from contextvars import ContextVar
+from typing import Any, Callable, Hashable, TypeVar
 
 from typing_extensions import Unpack
 
 from pytreeclass._src.backend import arraylib, treelib
-from pytreeclass._src.code_build import fields
+from pytreeclass._src.backend.treelib.base import instance_vars, update_instance_vars
+from pytreeclass._src.code_build import _direct_setattr_registry, fields
 from pytreeclass._src.tree_index import AtIndexer
 from pytreeclass._src.tree_pprint import (
     PPSpec,
@@ -32,25 +35,97 @@ from pytreeclass._src.tree_pprint import (
     tree_repr,
     tree_str,
 )
-from pytreeclass._src.tree_util import is_tree_equal, tree_copy, tree_hash
+from pytreeclass._src.tree_util import is_tree_equal, tree_copy
 
 T = TypeVar("T", bound=Hashable)
 S = TypeVar("S")
 PyTree = Any
 EllipsisType = type(Ellipsis)  # TODO: use typing.EllipsisType when available
-# set of instance ids that are marked as mutable.
-# being marked as mutable allows setattr/delattr to set/delete attributes.
-_mutable_instance_registry: set[int] = set()
+_MISSING = object()
+
+
+class MutableScope:
+    # nodes that are allowed to set/delete attributes inside a scope.
+    # `root` is always mutable, and if `recursive` the nodes of the `root`
+    # subtree are mutable too. the subtree nodes are collected when the scope
+    # is created (i.e. before the method runs), thus objects assigned to the
+    # tree inside the scope are not mutable. the nodes are referenced to avoid
+    # recycling their ids.
+    __slots__ = ["root", "recursive", "nodes"]
+
+    def __init__(self, root: Any, recursive: bool = False):
+        self.root = root
+        self.recursive = recursive
+        self.nodes: dict[int, Any] = {}
+
+        if recursive:
+            nodes = self.nodes
+
+            def collect(node: Any) -> bool:
+                # since the method can mutate either a leaf or a container
+                # `is_leaf` is used to visit all the subtree nodes
+                nodes[id(node)] = node
+                return False
+
+            treelib.tree_flatten(root, is_leaf=collect)
+
+    def __contains__(self, node: Any) -> bool:
+        return node is self.root or id(node) in self.nodes
+
+
+# chain of the active mutable scopes. being in a scope allows setattr/delattr
+# to set/delete attributes. scopes are context-local, thus a mutable scope in
+# a thread or an asyncio task does not leak to other threads or tasks.
+_mutable_scopes: ContextVar[tuple[MutableScope, ...]] = ContextVar(
+    "mutable_scopes",
+    default=(),
+)
+
+
+def is_mutable(node: Any) -> bool:
+    for scope in reversed(_mutable_scopes.get()):
+        if node in scope:
+            return True
+    return False
 
 
 def add_mutable_entry(node) -> None:
-    _mutable_instance_registry.add(id(node))
+    # mark `node` as mutable in the current context until `discard_mutable_entry`
+    _mutable_scopes.set((*_mutable_scopes.get(), MutableScope(node)))
 
 
 def discard_mutable_entry(node) -> None:
-    # use discard instead of remove to avoid raising KeyError
-    # if the node has been removed in a parent node.
-    _mutable_instance_registry.discard(id(node))
+    scopes = _mutable_scopes.get()
+    _mutable_scopes.set(tuple(s for s in scopes if s.root is not node))
+
+
+# cached hashes of immutable `TreeClass` instances keyed by the instance id.
+# the entry is removed when the instance is garbage collected, before its id
+# can be reused by another object.
+_hash_registry: dict[int, int] = {}
+
+
+def _is_subtree(tree: Any) -> Callable[[Any], bool]:
+    # nested `TreeClass` nodes are hashed as leaves using their cached hash
+    # to reuse the hashes of subtrees shared between trees.
+    return lambda node: node is not tree and isinstance(node, TreeClass)
+
+
+def treeclass_hash(tree: TreeClass) -> int:
+    if (value := _hash_registry.get(id(tree))) is not None:
+        return value
+    leaves, treedef = treelib.tree_flatten(tree, is_leaf=_is_subtree(tree))
+    value = hash((*leaves, treedef))
+    # do not cache the hash of an instance that can be mutated, i.e. during
+    # initialization or inside a functional method call `.at[method](...)`
+    if not is_mutable(tree):
+        try:
+            weakref.finalize(tree, _hash_registry.pop, id(tree), None)
+        except TypeError:
+            # not weak referenceable, e.g. `__slots__` without `__weakref__`
+            return value
+        _hash_registry[id(tree)] = value
+    return value
 
 
 def recursive_getattr(tree: Any, where: tuple[str, ...]):
@@ -61,23 +136,54 @@ def recursive_getattr(tree: Any, where: tuple[str, ...]):
     return recursive_getattr(getattr(tree, where[0]), where[1:])
 
 
+def copy_along_path(tree: Any, where: tuple[str, ...]) -> tuple[Any, Any]:
+    # copy `tree` to call a mutating method of the node at `where`. the method
+    # can only mutate the node subtree, thus the nodes along `where` are shallow
+    # copied, the node subtree is copied, and the rest of the subtrees are shared
+    # with the original tree. returns the copied tree and the copied node.
+    # a method of the root node can mutate any node in place (e.g. append to
+    # a list attribute), thus root method calls copy the whole tree.
+    if not where:
+        return (node := tree_copy(tree)), node
+
+    name, *rest = where
+    dynamic = instance_vars(tree) if isinstance(tree, TreeClass) else {}
+    child = dynamic.get(name, _MISSING)
+
+    if child is _MISSING or child is not getattr(tree, name):
+        # the node is not stored in the tree, e.g. returned by a property
+        # or modified by `on_getattr` callbacks, so copy the whole tree.
+        tree = tree_copy(tree)
+        return tree, recursive_getattr(tree, where)
+
+    (dynamic := dict(dynamic))[name], node = copy_along_path(child, tuple(rest))
+    clone = getattr(object, "__new__")(type(tree))
+    return update_instance_vars(clone, dynamic.items()), node
+
+
 class TreeClassIndexer(AtIndexer):
     def __call__(self, *a, **k) -> tuple[Any, PyTree]:
         """Call a method on the tree instance and return result and new instance."""
+        # verify the method exists on the original tree before copying it
+        recursive_getattr(self.tree, self.where)
+        *where, name = self.where
         # to apply mutable methods on the tree instance, first, the original
-        # tree is copied.
-        tree = tree_copy(self.tree)
-        # the copy is marked as mutable. since the method
-        # can mutate either a leaf or a container, `is_leaf` is used to traverse
-        # the tree depth-first and mark the ids of the tree nodes as mutable
-        treelib.tree_map(lambda _: _, tree, is_leaf=add_mutable_entry)
-        # execute the method on the copy of the tree with all of its nodes
-        # (leaves and containers) marked as mutable. this allows the method
-        # to mutate the tree instance at any level and from any inherited class.
-        value = recursive_getattr(tree, self.where)(*a, **k)  # type: ignore
-        # finally remove the mutable entries from the tree to disallow
-        # setattr/delattr to set/delete attributes after the modfications.
-        treelib.tree_map(lambda _: _, tree, is_leaf=discard_mutable_entry)
+        # tree is copied. only the method owner subtree and the nodes along
+        # the path to it are copied, the rest of the tree is shared.
+        tree, node = copy_along_path(self.tree, tuple(where))
+        # the copy is marked as mutable by entering a recursive mutable scope
+        # of the method owner. this allows the method to mutate the tree
+        # instance at any level and from any inherited class. the scope nodes
+        # are snapshotted here, thus objects passed to the method and assigned
+        # to the tree are not mutable.
+        scope = MutableScope(node, recursive=True)
+        token = _mutable_scopes.set((*_mutable_scopes.get(), scope))
+        try:
+            value = getattr(node, name)(*a, **k)  # type: ignore
+        finally:
+            # exit the scope to disallow setattr/delattr to set/delete
+            # attributes after the modfications, even if the method raises.
+            _mutable_scopes.reset(token)
         return value, tree
 
 
@@ -85,13 +191,15 @@ class TreeClassMeta(abc.ABCMeta):
     def __call__(klass: type[T], *a, **k) -> T:
         tree = getattr(klass, "__new__")(klass, *a, **k)
         # allow the setattr/delattr to set/delete attributes in the initialization
-        # phase by registering the instance as mutable.
-        add_mutable_entry(tree)
-        # initialize the instance with the instance marked as mutable.
-        getattr(klass, "__init__")(tree, *a, **k)
-        # remove the mutable entry after the initialization. to disallow
-        # setattr/delattr to set/delete attributes after the initialization.
-        discard_mutable_entry(tree)
+        # phase by entering a mutable scope of the instance.
+        token = _mutable_scopes.set((*_mutable_scopes.get(), MutableScope(tree)))
+        try:
+            # initialize the instance with the instance marked as mutable.
+            getattr(klass, "__init__")(tree, *a, **k)
+        finally:
+            # exit the scope after the initialization. to disallow
+            # setattr/delattr to set/delete attributes after the initialization.
+            _mutable_scopes.reset(token)
         return tree
 
 
@@ -150,6 +258,12 @@ class TreeClass(metaclass=TreeClassMeta):
            The expense of having to call through `at["method_name"]` instead of
            calling the method directly.
 
+           Only the subtree of the method owner and the nodes along the path
+           to it are copied, the rest of the subtrees are shared with the
+           original tree. For example ``tree.at["head"]["method"]()`` copies
+           ``tree.head`` and shallow copies ``tree``, whereas a method of the
+           root node, e.g. ``tree.at["method"]()``, copies the whole tree.
+
     Note:
         ``pytreeclass`` offers two methods to construct the ``__init__`` method:
 
@@ -246,6 +360,10 @@ class TreeClass(metaclass=TreeClassMeta):
         the branches are the containers that hold the leaves.
     """
 
+    # no instance `__dict__` is added, to allow subclasses with slots only,
+    # e.g. subclasses decorated with `autoinit(slots=True)`.
+    __slots__ = ()
+
     def __init_subclass__(klass: type[T], **k):
         # disallow setattr/delattr to be overridden as they are used
         # to implement the immutable/controlled mutability behavior.
@@ -257,7 +375,8 @@ class TreeClass(metaclass=TreeClassMeta):
         # register the class with the proper tree backend.
         # the registration envolves defining two rules: how to flatten the nested
         # structure of the class and how to unflatten the flattened structure.
-        # The flatten rule for `TreeClass` is equivalent to vars(self). and the
+        # The flatten rule for `TreeClass` is equivalent to vars(self) (or the
+        # slots values for `autoinit(slots=True)` classes). and the
         # unflatten rule is equivalent to `klass(**flat_tree)`. The flatten/unflatten
         # rule is exactly same as the flatten rule for normal dictionaries.
         treelib.register_treeclass(klass)
@@ -270,7 +389,7 @@ class TreeClass(metaclass=TreeClassMeta):
         # recall that during the functional call using .at["method"](*, **)
         # the tree is always copied and the copy is marked as mutable, thus
         # setattr is allowed to set attributes on the copy not the original.
-        if id(self) not in _mutable_instance_registry:
+        if not is_mutable(self):
             raise AttributeError(
                 f"Cannot set attribute {value=} to `{key=}`  "
                 f"on an immutable instance of `{type(self).__name__}`.\n"
@@ -282,6 +401,8 @@ class TreeClass(metaclass=TreeClassMeta):
                 f">>> tree2.{key}\n{value}"
             )
 
+        # invalidate the cached hash of the mutated instance
+        _hash_registry.pop(id(self), None)
         getattr(object, "__setattr__")(self, key, value)
 
     def __delattr__(self, key: str) -> None:
@@ -292,12 +413,13 @@ class TreeClass(metaclass=TreeClassMeta):
         # recall that during the functional call using .at["method"](*, **)
         # the tree is always copied and the copy is marked as mutable, thus
         # setattr is allowed to set attributes on the copy not the original.
-        if id(self) not in _mutable_instance_registry:
+        if not is_mutable(self):
             raise AttributeError(
                 f"Cannot delete attribute `{key}` "
                 f"on immutable instance of `{type(self).__name__}`.\n"
                 f"Use `.at['{key}'].set(None)` instead."
             )
+        _hash_registry.pop(id(self), None)
         getattr(object, "__delattr__")(self, key)
 
     @property
@@ -395,15 +517,22 @@ class TreeClass(metaclass=TreeClassMeta):
         return tree_copy(self)
 
     def __hash__(self) -> int:
-        return tree_hash(self)
+        # the hash is computed once per immutable instance and cached
+        return treeclass_hash(self)
 
     def __eq__(self, other: Any) -> bool | arraylib.ndarray:
         return is_tree_equal(self, other)
 
 
+# setting attributes is allowed during initialization, thus `autoinit` can write
+# the fields directly to the instance `__dict__` in the generated `__init__`
+# while the instance is mutable.
+_direct_setattr_registry[TreeClass.__setattr__] = is_mutable
+
+
 @pp_dispatcher.register(TreeClass)
 def treeclass_pp(node: TreeClass, **spec: Unpack[PPSpec]) -> str:
     name = type(node).__name__
     skip = [f.name for f in fields(node) if not f.repr]
-    kvs = tuple((k, v) for k, v in vars(node).items() if k not in skip)
+    kvs = tuple((k, v) for k, v in instance_vars(node).items() if k not in skip)
     return name + "(" + pps(kvs, pp=attr_value_pp, **spec) + ")"
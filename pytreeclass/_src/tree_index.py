@@ -19,9 +19,11 @@
 # parts: 1) *where* to select the parts of the pytree and 2) *what* to do with
 # the selected parts. the *where* part is defined either by a path or a boolean
 # mask. the *what* part is defined by a set value, or a function to apply to
-# the selected parts. once we have a *final* boolean mask that encompasses all
-# path and the boolean mask, we can use `tree_map` to apply the *what* part to
-# the *where* part. for example, for a tree = [[1, 2], 3, 4] and boolean mask
+# the selected parts. once we have a *final* selection that encompasses all
+# path and the boolean mask, we apply the *what* part to the *where* part.
+# the selection is sparse, i.e. the flat indices of the selected leaves, thus
+# only the selected leaves are visited and replaced in the flat leaves before
+# unflattening. for example, for a tree = [[1, 2], 3, 4] and boolean mask
 # [[True, False], False, True] and path mask [0][1], then we select only leaf
 # 1 that is at the intersection of the boolean mask and the path mask. then we
 # apply the *what* part to the *where* part.
@@ -31,15 +33,22 @@ from __future__ import annotations
 import abc
 import functools as ft
 import re
-from typing import Any, Callable, Hashable, NamedTuple, Tuple, TypeVar
+from typing import Any, Awaitable, Callable, Hashable, NamedTuple, Tuple, TypeVar
 from typing_extensions import Self
 
 from pytreeclass._src.backend import arraylib, treelib
-from pytreeclass._src.backend.treelib.base import ParallelConfig
+from pytreeclass._src.backend.treelib.base import (
+    CacheInfo,
+    LRUCache,
+    ParallelConfig,
+    async_concurrent_map,
+    concurrent_map,
+)
 
 T = TypeVar("T")
 S = TypeVar("S")
 PyTree = Any
+PyTreeDef = Any
 EllipsisType = TypeVar("EllipsisType")
 KeyEntry = TypeVar("KeyEntry", bound=Hashable)
 TypeEntry = TypeVar("TypeEntry", bound=type)
@@ -284,7 +293,21 @@ indexer_dispatcher.register(int, IntKey)
 indexer_dispatcher.register(str, NameKey)
 indexer_dispatcher.register(re.Pattern, RegexKey)
 
-BaseKey.def_alias = indexer_dispatcher.register
+
+# compiled `where` plans: (treedef, normalized where, is_leaf) -> leaf indices
+# the plan depends only on the tree structure (unless custom nodes compute
+# their path keys from data), so repeated indexing of trees with the same
+# structure skips the key resolution and the path matching.
+_where_plan_cache = LRUCache(maxsize=256)
+
+
+def _def_alias(klass: type, func: Callable[[Any], BaseKey] | None = None):
+    # new aliases change how `where` keys are resolved, invalidate the plans
+    _where_plan_cache.clear()
+    return indexer_dispatcher.register(klass, func)
+
+
+BaseKey.def_alias = _def_alias
 
 
 _NOT_IMPLEMENTED_INDEXING = """Indexing with {} is not implemented, supported indexing types are:
@@ -298,40 +321,87 @@ _NOT_IMPLEMENTED_INDEXING = """Indexing with {} is not implemented, supported in
 """
 
 
-def _generate_path_mask(
-    tree: PyTree,
-    where: tuple[BaseKey, ...],
-    is_leaf: Callable[[Any], None] | None = None,
-) -> PyTree:
-    # generate a boolean mask for `where` path in `tree`
-    # where path is a tuple of indices or keys, for example
-    # where=("a",) wil set all leaves of `tree` with key "a" to True and
-    # all other leaves to False
-    match = False
-
-    def map_func(path, _: Any):
-        
-        if len(where) > len(path):
-            # path is shorter than `where` path. for example
-            # where=("a", "b") and the current path is ("a",) then
-            # the current path is not a match
-            return False
-        for wi, ki in zip(where, path):
-            if not (wi == ki):
-                return False
+class _PathTrieNode:
+    # a node in a prefix tree of the leaves paths. leaves sharing a path prefix
+    # share the prefix nodes. the leaves under a node are contiguous in the
+    # flattened order, thus stored as a `start`/`stop` range of flat indices.
+    __slots__ = ["entry", "start", "stop", "children"]
 
-        nonlocal match
-        match = True
-        return match
+    def __init__(self, entry: KeyEntry | None, start: int):
+        self.entry = entry
+        self.start = start
+        self.stop = start
+        self.children: list[_PathTrieNode] = []
 
-    
 
-    mask = treelib.tree_path_map(map_func, tree, is_leaf=is_leaf)
+def _build_path_trie(paths: list[KeyPath]) -> _PathTrieNode:
+    root = _PathTrieNode(None, 0)
+    # nodes along the previous path, used to find the shared prefix nodes
+    # since consecutive leaves share the prefix nodes in depth-first order
+    stack = [root]
 
-    if not match:
-        raise LookupError(f"No leaf match is found for {where=}.")
+    for index, path in enumerate(paths):
+        depth = 0
+        while (
+            depth < len(path)
+            and depth + 1 < len(stack)
+            and stack[depth + 1].entry == path[depth]
+        ):
+            depth += 1
+
+        del stack[depth + 1 :]
+
+        for entry in path[depth:]:
+            stack[-1].children.append(child := _PathTrieNode(entry, index))
+            stack.append(child)
 
-    return mask
+        for node in stack:
+            node.stop = index + 1
+
+    return root
+
+
+def _generate_path_indices(
+    tree: PyTree,
+    where: tuple[BaseKey, ...],
+    is_leaf: Callable[[Any], None] | None = None,
+) -> tuple[int, ...]:
+    # generate the flat leaf indices matching the `where` path in `tree`
+    # where path is a tuple of indices or keys, for example
+    # where=("a",) will select all leaves of `tree` under key "a"
+    # the leaves paths are grouped in a prefix tree, so a mismatch at a prefix
+    # prunes all the leaves under it at once.
+    paths_leaves, _ = treelib.tree_path_flatten(tree, is_leaf=is_leaf)
+    root = _build_path_trie([path for path, _ in paths_leaves])
+    # memoize the match result of a key entry at each level, to evaluate
+    # the `where` key once per distinct key entry. e.g. `RegexKey` matching
+    # the same attribute name under multiple parents
+    memos: list[dict[KeyEntry, bool]] = [dict() for _ in where]
+    indices: list[int] = []
+
+    def is_match(depth: int, entry: KeyEntry) -> bool:
+        try:
+            if (verdict := memos[depth].get(entry)) is None:
+                verdict = memos[depth][entry] = bool(where[depth] == entry)
+            return verdict
+        except TypeError:
+            # unhashable key entry
+            return bool(where[depth] == entry)
+
+    def traverse(node: _PathTrieNode, depth: int) -> None:
+        if depth == len(where):
+            # the `where` path is a prefix of the node path, so select all
+            # the leaves under the node
+            indices.extend(range(node.start, node.stop))
+            return
+        # leaves with path shorter than `where` path have no children to match
+        # for example where=("a", "b") and the leaf path is ("a",)
+        for child in node.children:
+            if is_match(depth, child.entry):
+                traverse(child, depth + 1)
+
+    traverse(root, 0)
+    return tuple(indices)
 
 
 def _combine_bool_leaves(*leaves):
@@ -347,18 +417,24 @@ def _is_bool_leaf(leaf: Any) -> bool:
     return isinstance(leaf, bool)
 
 
-def _resolve_where(
-    tree: T,
-    where: tuple[Any, ...],  # type: ignore
-    is_leaf: Callable[[Any], None] | None = None,
-) -> T | None:
-    # given a pytree `tree` and a `where` path, that is composed of keys or
-    # boolean masks, generate a boolean mask that will be eventually used to
-    # with `tree_map` to select the leaves at the specified location.
-    mask = None
-    bool_masks: list[T] = []
-    path_masks: list[BaseKey] = []
-    _, treedef0 = treelib.tree_flatten(tree, is_leaf=is_leaf)
+def _normalize_where(where: tuple[Any, ...]) -> Hashable:
+    # tag each key with its type to avoid sharing a plan between keys that
+    # hash and compare equal but resolve differently. e.g. `1`, `1.0`, `True`
+    def normalize(x: Any) -> Hashable:
+        if type(x) is tuple:
+            return tuple(map(normalize, x))
+        return (type(x), x)
+
+    return tuple(map(normalize, where))
+
+
+def _split_where(
+    where: tuple[Any, ...],
+    treedef0: Any,
+) -> tuple[list[BaseKey], list[PyTree]]:
+    # resolve `where` into path keys (one `BaseKey` per level) and boolean masks
+    bool_masks: list[PyTree] = []
+    path_keys: list[BaseKey] = []
     seen_tuple = False  # handle multiple keys at the same level
     level_paths = []
 
@@ -397,18 +473,190 @@ def _resolve_where(
         # if len(level_paths) > 1 then this means that we have multiple keys
         # at the same level, for example where = ("a", ("b", "c")) then this
         # means that for a parent "a", select "b" and "c".
-        path_masks += [MultiKey(*level_paths)] if len(level_paths) > 1 else level_paths
+        path_keys += [MultiKey(*level_paths)] if len(level_paths) > 1 else level_paths
         level_paths = []
         seen_tuple = False
 
-    if path_masks:
-        mask = _generate_path_mask(tree, path_masks, is_leaf=is_leaf)
+    return path_keys, bool_masks
+
+
+class _Selection(NamedTuple):
+    # sparse selection of the tree leaves. `indices` are the sorted flat indices
+    # of the selected leaves, and `masks` holds for each selected leaf either
+    # `True` to select the whole leaf or a boolean array to select parts of it.
+    indices: tuple[int, ...] = ()
+    masks: tuple[Any, ...] = ()
+
+
+def _resolve_where(
+    tree: T,
+    treedef0: PyTreeDef,
+    where: tuple[Any, ...],  # type: ignore
+    is_leaf: Callable[[Any], None] | None = None,
+) -> _Selection:
+    # given a pytree `tree` with structure `treedef0` and a `where` path, that
+    # is composed of keys or boolean masks, generate a sparse selection of the
+    # flat leaves that will be eventually used to operate only on the leaves
+    # at the specified location. the caller flattens `tree` once and passes
+    # its structure, the tree is traversed again only to compile a new path.
+    bool_masks: list[T] = []
 
-    if bool_masks:
-        all_masks = [mask, *bool_masks] if mask else bool_masks
-        mask = treelib.tree_map(_combine_bool_leaves, *all_masks)
+    try:
+        # path-only `where` is compiled once per tree structure. boolean masks
+        # are data, so `where` containing masks is resolved on every call.
+        key = (treedef0, _normalize_where(where), is_leaf)
+        indices = _where_plan_cache.get(key)
+    except TypeError:
+        # unhashable `where` entries (e.g. dict masks) or tree structure
+        key = indices = None
+
+    if indices is None:
+        path_keys, bool_masks = _split_where(where, treedef0)
+        if path_keys:
+            indices = _generate_path_indices(tree, path_keys, is_leaf)
+            # custom nodes can compute their path keys from the node data, so
+            # a plan is cached only if the paths depend on the structure alone
+            cached = key is not None and not bool_masks
+            if cached and treelib.is_structure_keyed(treedef0):
+                _where_plan_cache[key] = indices
+            if not indices:
+                raise LookupError(f"No leaf match is found for where={path_keys}.")
+
+    elif not indices:
+        raise LookupError(f"No leaf match is found for {where=}.")
 
-    return mask
+    if not bool_masks:
+        return _Selection(indices or (), (True,) * len(indices or ()))
+
+    # intersect the path selection with the boolean masks leaves
+    # no path keys means all leaves are candidates for the boolean masks
+    masks_leaves = [treelib.tree_flatten(mask)[0] for mask in bool_masks]
+    candidates = range(treedef0.num_leaves) if indices is None else indices
+    selected_indices, selected_masks = [], []
+
+    for index in candidates:
+        mask = _combine_bool_leaves(*(leaves[index] for leaves in masks_leaves))
+        if mask is False:
+            continue
+        selected_indices += [index]
+        selected_masks += [mask]
+
+    return _Selection(tuple(selected_indices), tuple(selected_masks))
+
+
+def _leaf_get(leaf: Any, where: Any):
+    # support both array and non-array leaves
+    # for array boolean mask we select **parts** of the array that
+    # matches the mask, for example if the mask is Array([True, False, False])
+    # and the leaf is Array([1, 2, 3]) then the result is Array([1])
+    if isinstance(where, arraylib.ndarray) and arraylib.ndim(where) != 0:
+        return leaf[where]
+    # non-array boolean mask we select the leaf if the mask is True
+    # and `None` otherwise
+    return leaf if where else None
+
+
+def _leaf_set(leaf: Any, where: Any, set_value: Any):
+    # support both array and non-array leaves
+    # for array boolean mask we select **parts** of the array that
+    # matches the mask, for example if the mask is Array([True, False, False])
+    # and the leaf is Array([1, 2, 3]) then the result is Array([1, 100, 100])
+    # with set_value = 100
+    if isinstance(where, arraylib.ndarray):
+        return arraylib.where(where, set_value, leaf)
+    return set_value if where else leaf
+
+
+def _leaf_apply(func: Callable[[Any], Any], leaf: Any, where: Any):
+    # same as `_leaf_set` but with `func` applied to the leaf
+    # one thing to note is that, the where mask select an array
+    # then the function needs work properly when applied to the selected
+    # array elements
+    if isinstance(where, arraylib.ndarray):
+        return arraylib.where(where, func(leaf), leaf)
+    return func(leaf) if where else leaf
+
+
+def _selection_map(
+    func: Callable[..., Any],
+    selection: _Selection,
+    leaves: list[Any],
+    *rest: list[Any],
+    is_parallel: bool | ParallelConfig = False,
+) -> list[Any]:
+    # apply `func` to the selected leaves and their masks only
+    flat = [[leaves[i] for i in selection.indices], selection.masks]
+    flat += [[r[i] for i in selection.indices] for r in rest]
+    if not is_parallel:
+        return [func(*args) for args in zip(*flat)]
+    config = dict() if is_parallel is True else is_parallel
+    return concurrent_map(func, flat, **config)
+
+
+def _set_values(
+    set_value: Any,
+    selection: _Selection,
+    leaves: list[Any],
+    treedef: PyTreeDef,
+    is_leaf: Callable[[Any], None] | None = None,
+    is_parallel: bool | ParallelConfig = False,
+) -> list[Any]:
+    # compute the new values of the selected leaves for `set`
+    set_leaves, rhsdef = treelib.tree_flatten(set_value, is_leaf=is_leaf)
+    config = dict(is_parallel=is_parallel)
+
+    if treedef == rhsdef:
+        # do not broadcast set_value if it is a pytree of same structure
+        # for example tree.at[where].set(tree2) will set all tree leaves
+        # to tree2 leaves if tree2 is a pytree of same structure as tree
+        # instead of making each leaf of tree a copy of tree2
+        # is design is similar to ``numpy`` design `np.at[...].set(Array)`
+        return _selection_map(_leaf_set, selection, leaves, set_leaves, **config)
+
+    # set_value is broadcasted to tree leaves
+    # for example tree.at[where].set(1) will set all tree leaves to 1
+    leaf_set = ft.partial(_leaf_set, set_value=set_value)
+    return _selection_map(leaf_set, selection, leaves, **config)
+
+
+def _apply_values(
+    func: Callable[[Any], Any],
+    selection: _Selection,
+    leaves: list[Any],
+    is_parallel: bool | ParallelConfig = False,
+) -> list[Any]:
+    # compute the new values of the selected leaves for `apply`
+    # `func` is bound with `partial` to be picklable for process pools
+    leaf_apply = ft.partial(_leaf_apply, func)
+    return _selection_map(leaf_apply, selection, leaves, is_parallel=is_parallel)
+
+
+async def _async_apply_values(
+    func: Callable[[Any], Awaitable[Any]],
+    selection: _Selection,
+    leaves: list[Any],
+    max_concurrency: int | None = None,
+) -> list[Any]:
+    # same as `_apply_values` but awaits the coroutines of `func` concurrently
+    async def leaf_apply(leaf: Any, where: bool):
+        if isinstance(where, arraylib.ndarray):
+            return arraylib.where(where, await func(leaf), leaf)
+        return (await func(leaf)) if where else leaf
+
+    flat = [[leaves[i] for i in selection.indices], selection.masks]
+    return await async_concurrent_map(leaf_apply, flat, max_concurrency)
+
+
+def _replace_leaves(
+    leaves: list[Any],
+    selection: _Selection,
+    values: list[Any],
+) -> list[Any]:
+    # only the selected leaves are replaced
+    leaves = list(leaves)
+    for index, value in zip(selection.indices, values):
+        leaves[index] = value
+    return leaves
 
 
 class AtIndexer(NamedTuple):
@@ -426,6 +674,26 @@ class AtIndexer(NamedTuple):
             - an instance of ``BaseKey`` with custom logic to index a pytree.
             - a tuple of the above to match multiple keys at the same level.
 
+    Note:
+        Path-based selections are compiled once per tree structure and cached
+        in a bounded LRU cache keyed by the tree structure, the ``where`` path,
+        and ``is_leaf``. Repeated indexing of trees with the same structure
+        reuses the compiled selection. Selections of trees with custom nodes
+        that compute their path keys from the node data are not cached. Use
+        :meth:`.AtIndexer.cache_clear` to invalidate the compiled selections,
+        for example after changing the ``__eq__`` logic of a custom hashable
+        :class:`.BaseKey`.
+
+        >>> import pytreeclass as tc
+        >>> tc.AtIndexer.cache_clear()
+        >>> tree = {"a": 1, "b": 2}
+        >>> tc.AtIndexer(tree)["a"].get()
+        {'a': 1, 'b': None}
+        >>> tc.AtIndexer({"a": 3, "b": 4})["a"].get()  # same structure
+        {'a': 3, 'b': None}
+        >>> tc.AtIndexer.cache_info()
+        CacheInfo(hits=1, misses=1, maxsize=256, currsize=1)
+
     Example:
         >>> # use `AtIndexer` on a pytree (e.g. dict,list,tuple,etc.)
         >>> import jax
@@ -465,11 +733,51 @@ class AtIndexer(NamedTuple):
         ...        return f"{self.__class__.__name__}(a={self.a}, b={self.b})"
         >>> Tree(1, 2).at["a"].get()
         Tree(a=1, b=None)
+
     """
 
     tree: PyTree
     where: tuple[BaseKey | PyTree] | tuple[()] = ()
 
+    @staticmethod
+    def cache_info() -> CacheInfo:
+        """Return the hits, misses and size of the compiled ``where`` cache."""
+        return _where_plan_cache.info()
+
+    @staticmethod
+    def cache_clear() -> None:
+        """Clear the compiled ``where`` cache."""
+        _where_plan_cache.clear()
+
+    def batch(self) -> AtBatch:
+        """Collect multiple ``set``/``apply`` operations and run them in one pass.
+
+        Chaining ``.at[...]`` operations flattens and unflattens the tree
+        once per operation. Instead, :meth:`.AtIndexer.batch` records the
+        operations and resolves all of them against a single flatten of the
+        tree on ``commit``, then builds the result tree once.
+
+        Returns:
+            A batch indexer. Index it and call ``set``/``apply`` to record an
+            operation, then call ``commit`` to return the updated tree. The
+            ``where`` path of the indexer (if any) is used as a prefix for all
+            the recorded operations.
+
+        Example:
+            >>> import pytreeclass as tc
+            >>> tree = {"a": 1, "b": [1, 2, 3], "c": 3}
+            >>> batch = tc.AtIndexer(tree).batch()
+            >>> batch = batch["a"].set(100)["b"].apply(lambda x: x + 1)
+            >>> batch["c"].set(300).commit()
+            {'a': 100, 'b': [2, 3, 4], 'c': 300}
+
+        Note:
+            Operations are applied in order, i.e. ``apply`` after ``set`` on
+            the same leaf sees the new value. All the ``where`` paths are
+            resolved against the structure of the original tree.
+        """
+        return AtBatch(self.tree, self.where, prefix=self.where)
+
     def __getitem__(self, where: Any) -> Self:
         # AtIndexer[where] will extend the current path with `where`
         # for example AtIndexer[where1][where2] will extend the current path
@@ -493,6 +801,14 @@ class AtIndexer(NamedTuple):
                 - ``dict``: a dict of of:
                     - ``max_workers``: maximum number of workers to use.
                     - ``kind``: kind of pool to use, either ``thread`` or ``process``.
+                    - ``chunksize``: number of leaves submitted to a worker at once.
+                    - ``chunking``: ``count`` (default) to chunk the leaves by count,
+                      ``cost`` to group the leaves into chunks of balanced size
+                      (array ``nbytes``), submitting the costly leaves first, or
+                      a callable that returns the cost of the leaf arguments.
+                    - ``executor``: an executor to use instead of the persistent pool.
+                    - ``shared_memory``: pass large ``numpy`` arrays to/from the
+                      ``process`` pool workers through shared memory.
 
         Returns:
             A _new_ pytree of leaf values at the specified location, with the
@@ -517,22 +833,14 @@ class AtIndexer(NamedTuple):
             >>> tree.at['a'].get()
             Tree(a=1, b=None)
         """
-        where = _resolve_where(self.tree, self.where, is_leaf)
-        
-        config = dict(is_leaf=is_leaf, is_parallel=is_parallel)
-
-        def leaf_get(leaf: Any, where: Any):
-            # support both array and non-array leaves
-            # for array boolean mask we select **parts** of the array that
-            # matches the mask, for example if the mask is Array([True, False, False])
-            # and the leaf is Array([1, 2, 3]) then the result is Array([1])
-            if isinstance(where, arraylib.ndarray) and arraylib.ndim(where) != 0:
-                return leaf[where]
-            # non-array boolean mask we select the leaf if the mask is True
-            # and `None` otherwise
-            return leaf if where else None
-
-        return treelib.tree_map(leaf_get, self.tree, where, **config)
+        leaves, treedef = treelib.tree_flatten(self.tree, is_leaf=is_leaf)
+        selection = _resolve_where(self.tree, treedef, self.where, is_leaf)
+        # non-selected leaves are set to `None`
+        values = _selection_map(_leaf_get, selection, leaves, is_parallel=is_parallel)
+        out = [None] * len(leaves)
+        for index, value in zip(selection.indices, values):
+            out[index] = value
+        return treelib.tree_unflatten(treedef, out)
 
     def set(
         self,
@@ -552,6 +860,14 @@ class AtIndexer(NamedTuple):
                 - ``dict``: a dict of of:
                     - ``max_workers``: maximum number of workers to use.
                     - ``kind``: kind of pool to use, either ``thread`` or ``process``.
+                    - ``chunksize``: number of leaves submitted to a worker at once.
+                    - ``chunking``: ``count`` (default) to chunk the leaves by count,
+                      ``cost`` to group the leaves into chunks of balanced size
+                      (array ``nbytes``), submitting the costly leaves first, or
+                      a callable that returns the cost of the leaf arguments.
+                    - ``executor``: an executor to use instead of the persistent pool.
+                    - ``shared_memory``: pass large ``numpy`` arrays to/from the
+                      ``process`` pool workers through shared memory.
 
         Returns:
             A pytree with the leaf values at the specified location
@@ -576,34 +892,12 @@ class AtIndexer(NamedTuple):
             >>> tree.at['a'].set(100)
             Tree(a=100, b=2)
         """
-        where = _resolve_where(self.tree, self.where, is_leaf)
+        leaves, treedef = treelib.tree_flatten(self.tree, is_leaf=is_leaf)
+        selection = _resolve_where(self.tree, treedef, self.where, is_leaf)
         config = dict(is_leaf=is_leaf, is_parallel=is_parallel)
-
-        def leaf_set(leaf: Any, where: Any, set_value: Any):
-            # support both array and non-array leaves
-            # for array boolean mask we select **parts** of the array that
-            # matches the mask, for example if the mask is Array([True, False, False])
-            # and the leaf is Array([1, 2, 3]) then the result is Array([1, 100, 100])
-            # with set_value = 100
-            if isinstance(where, arraylib.ndarray):
-                return arraylib.where(where, set_value, leaf)
-            return set_value if where else leaf
-
-        _, lhsdef = treelib.tree_flatten(self.tree, is_leaf=is_leaf)
-        _, rhsdef = treelib.tree_flatten(set_value, is_leaf=is_leaf)
-
-        if lhsdef == rhsdef:
-            # do not broadcast set_value if it is a pytree of same structure
-            # for example tree.at[where].set(tree2) will set all tree leaves
-            # to tree2 leaves if tree2 is a pytree of same structure as tree
-            # instead of making each leaf of tree a copy of tree2
-            # is design is similar to ``numpy`` design `np.at[...].set(Array)`
-            return treelib.tree_map(leaf_set, self.tree, where, set_value, **config)
-
-        # set_value is broadcasted to tree leaves
-        # for example tree.at[where].set(1) will set all tree leaves to 1
-        leaf_set_ = lambda leaf, where: leaf_set(leaf, where, set_value)
-        return treelib.tree_map(leaf_set_, self.tree, where, **config)
+        values = _set_values(set_value, selection, leaves, treedef, **config)
+        leaves = _replace_leaves(leaves, selection, values)
+        return treelib.tree_unflatten(treedef, leaves)
 
     def apply(
         self,
@@ -623,6 +917,14 @@ class AtIndexer(NamedTuple):
                 - ``dict``: a dict of of:
                     - ``max_workers``: maximum number of workers to use.
                     - ``kind``: kind of pool to use, either ``thread`` or ``process``.
+                    - ``chunksize``: number of leaves submitted to a worker at once.
+                    - ``chunking``: ``count`` (default) to chunk the leaves by count,
+                      ``cost`` to group the leaves into chunks of balanced size
+                      (array ``nbytes``), submitting the costly leaves first, or
+                      a callable that returns the cost of the leaf arguments.
+                    - ``executor``: an executor to use instead of the persistent pool.
+                    - ``shared_memory``: pass large ``numpy`` arrays to/from the
+                      ``process`` pool workers through shared memory.
 
         Returns:
             A pytree with the leaf values at the specified location set to
@@ -654,19 +956,50 @@ class AtIndexer(NamedTuple):
             >>> indexer = tc.AtIndexer({"lenna": "lenna.png", "baboon": "baboon.png"})
             >>> images = indexer[...].apply(imread, parallel=dict(max_workers=2))  # doctest: +SKIP
         """
-        where = _resolve_where(self.tree, self.where, is_leaf)
-        config = dict(is_leaf=is_leaf, is_parallel=is_parallel)
+        leaves, treedef = treelib.tree_flatten(self.tree, is_leaf=is_leaf)
+        selection = _resolve_where(self.tree, treedef, self.where, is_leaf)
+        values = _apply_values(func, selection, leaves, is_parallel=is_parallel)
+        leaves = _replace_leaves(leaves, selection, values)
+        return treelib.tree_unflatten(treedef, leaves)
 
-        def leaf_apply(leaf: Any, where: bool):
-            # same as `leaf_set` but with `func` applied to the leaf
-            # one thing to note is that, the where mask select an array
-            # then the function needs work properly when applied to the selected
-            # array elements
-            if isinstance(where, arraylib.ndarray):
-                return arraylib.where(where, func(leaf), leaf)
-            return func(leaf) if where else leaf
+    async def apply_async(
+        self,
+        func: Callable[[Any], Awaitable[Any]],
+        *,
+        is_leaf: Callable[[Any], None] | None = None,
+        max_concurrency: int | None = None,
+    ) -> PyTree:
+        """Apply a coroutine function to the leaf values at the specified location.
+
+        The coroutines of the selected leaves run concurrently in the running
+        event loop. Useful for I/O bound leaf transformations, e.g. loading
+        the leaves from files or remote storage.
+
+        Args:
+            func: the ``async`` function to apply to the leaf values.
+            is_leaf: a predicate function to determine if a value is a leaf.
+            max_concurrency: maximum number of coroutines running at a time.
+                ``None`` (default) for no limit.
+
+        Returns:
+            A pytree with the leaf values at the specified location set to
+            the result of awaiting ``func`` on the leaf values.
 
-        return treelib.tree_map(leaf_apply, self.tree, where, **config)
+        Example:
+            >>> import asyncio
+            >>> import pytreeclass as tc
+            >>> async def load(name: str) -> str:
+            ...     await asyncio.sleep(0.01)  # e.g. read a file
+            ...     return name.upper()
+            >>> indexer = tc.AtIndexer({"a": "x", "b": ["y", "z"]})
+            >>> asyncio.run(indexer["b"].apply_async(load, max_concurrency=2))
+            {'a': 'x', 'b': ['Y', 'Z']}
+        """
+        leaves, treedef = treelib.tree_flatten(self.tree, is_leaf=is_leaf)
+        selection = _resolve_where(self.tree, treedef, self.where, is_leaf)
+        values = await _async_apply_values(func, selection, leaves, max_concurrency)
+        leaves = _replace_leaves(leaves, selection, values)
+        return treelib.tree_unflatten(treedef, leaves)
 
     def scan(
         self,
@@ -727,7 +1060,8 @@ class AtIndexer(NamedTuple):
             them with final state. While ``reduce`` applies a binary ``func`` to the
             leaf values while carrying a state and returning a single value.
         """
-        where = _resolve_where(self.tree, self.where, is_leaf)
+        leaves, treedef = treelib.tree_flatten(self.tree, is_leaf=is_leaf)
+        selection = _resolve_where(self.tree, treedef, self.where, is_leaf)
 
         running_state = state
 
@@ -741,8 +1075,9 @@ class AtIndexer(NamedTuple):
                 return arraylib.where(where, stateless_func(leaf), leaf)
             return stateless_func(leaf) if where else leaf
 
-        out = treelib.tree_map(leaf_apply, self.tree, where, is_leaf=is_leaf)
-        return out, running_state
+        values = _selection_map(leaf_apply, selection, leaves)
+        leaves = _replace_leaves(leaves, selection, values)
+        return treelib.tree_unflatten(treedef, leaves), running_state
 
     def reduce(
         self,
@@ -779,9 +1114,85 @@ class AtIndexer(NamedTuple):
             >>> tree.at[...].reduce(lambda a, b: a + b, initializer=0)
             3
         """
-        where = _resolve_where(self.tree, self.where, is_leaf)
-        tree = self[where].get(is_leaf=is_leaf)  # type: ignore
-        leaves, _ = treelib.tree_flatten(tree, is_leaf=is_leaf)
+        leaves, treedef = treelib.tree_flatten(self.tree, is_leaf=is_leaf)
+        selection = _resolve_where(self.tree, treedef, self.where, is_leaf)
+        # same as reducing the leaves of `get` output, without building the tree
+        # non-selected leaves (`None`) are not part of the reduction
+        leaves = _selection_map(_leaf_get, selection, leaves)
+        leaves = [leaf for leaf in leaves if leaf is not None]
         if initializer is _no_initializer:
             return ft.reduce(func, leaves)
         return ft.reduce(func, leaves, initializer)
+
+
+class _BatchOp(NamedTuple):
+    kind: str  # either "set" or "apply"
+    where: tuple[Any, ...]
+    value: Any  # set value or the function to apply
+
+
+class AtBatch(NamedTuple):
+    """Record ``set``/``apply`` operations to run on a single tree flatten.
+
+    Note:
+        Use :meth:`.AtIndexer.batch` to create an instance.
+    """
+
+    tree: PyTree
+    where: tuple[BaseKey | PyTree] | tuple[()] = ()
+    ops: tuple[_BatchOp, ...] = ()
+    prefix: tuple[BaseKey | PyTree] | tuple[()] = ()
+
+    def __getitem__(self, where: Any) -> Self:
+        return self._replace(where=(*self.where, where))
+
+    def set(self, set_value: Any) -> Self:
+        """Record setting the leaf values at the current location."""
+        op = _BatchOp("set", self.where, set_value)
+        return self._replace(where=self.prefix, ops=(*self.ops, op))
+
+    def apply(self, func: Callable[[Any], Any]) -> Self:
+        """Record applying ``func`` to the leaf values at the current location."""
+        op = _BatchOp("apply", self.where, func)
+        return self._replace(where=self.prefix, ops=(*self.ops, op))
+
+    def commit(
+        self,
+        *,
+        is_leaf: Callable[[Any], None] | None = None,
+        is_parallel: bool | ParallelConfig = False,
+    ) -> PyTree:
+        """Run the recorded operations in order and return the updated tree.
+
+        Args:
+            is_leaf: a predicate function to determine if a value is a leaf.
+            is_parallel: accepts the following:
+
+                - ``bool``: apply ``func`` in parallel if ``True`` otherwise in serial.
+                - ``dict``: a dict of of:
+                    - ``max_workers``: maximum number of workers to use.
+                    - ``kind``: kind of pool to use, either ``thread`` or ``process``.
+                    - ``chunksize``: number of leaves submitted to a worker at once.
+                    - ``chunking``: ``count`` (default) to chunk the leaves by count,
+                      ``cost`` to group the leaves into chunks of balanced size
+                      (array ``nbytes``), submitting the costly leaves first, or
+                      a callable that returns the cost of the leaf arguments.
+                    - ``executor``: an executor to use instead of the persistent pool.
+                    - ``shared_memory``: pass large ``numpy`` arrays to/from the
+                      ``process`` pool workers through shared memory.
+        """
+        leaves, treedef = treelib.tree_flatten(self.tree, is_leaf=is_leaf)
+        leaves = list(leaves)
+
+        for op in self.ops:
+            selection = _resolve_where(self.tree, treedef, op.where, is_leaf)
+            if op.kind == "set":
+                config = dict(is_leaf=is_leaf, is_parallel=is_parallel)
+                values = _set_values(op.value, selection, leaves, treedef, **config)
+            else:
+                values = _apply_values(op.value, selection, leaves, is_parallel)
+            # leaves are replaced in place, the list is a private copy
+            for index, value in zip(selection.indices, values):
+                leaves[index] = value
+
+        return treelib.tree_unflatten(treedef, leaves)
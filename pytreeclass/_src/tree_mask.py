@@ -18,7 +18,8 @@ from __future__ import annotations
 
 import functools as ft
 import hashlib
-from typing import Any, Callable, Generic, NamedTuple, TypeVar, Union
+import weakref
+from typing import Any, Callable, Generic, Hashable, NamedTuple, TypeVar, Union
 
 from pytreeclass._src.backend import arraylib, treelib
 from pytreeclass._src.tree_pprint import tree_repr, tree_str, tree_summary
@@ -100,8 +101,16 @@ def _(node) -> str:
 
 
 class _FrozenHashable(_FrozenBase):
+    # the wrapped value is immutable, thus its hash is computed once
+    __slots__ = ["__hash_value__"]
+
     def __hash__(self) -> int:
-        return tree_hash(self.__wrapped__)
+        try:
+            return self.__hash_value__
+        except AttributeError:
+            value = tree_hash(self.__wrapped__)
+            object.__setattr__(self, "__hash_value__", value)
+            return value
 
     def __eq__(self, rhs: Any) -> bool | arraylib.ndarray:
         if not isinstance(rhs, _FrozenHashable):
@@ -109,14 +118,68 @@ class _FrozenHashable(_FrozenBase):
         return is_tree_equal(self.__wrapped__, rhs.__wrapped__)
 
 
+# hashes of frozen arrays keyed by the array id. each entry holds the array
+# version and the hashing config at hashing time, and is removed when the array
+# is garbage collected. arrays without version (e.g. writeable numpy arrays)
+# are hashed on every call.
+_array_hash_registry: dict[int, tuple[Hashable, int]] = {}
+
+
+def _hash_buffer(buffer: memoryview | bytes, method: str) -> int:
+    if method == "blake2b":
+        digest = hashlib.blake2b(buffer, digest_size=8).digest()
+        return int.from_bytes(digest, "little")
+    if method == "xxhash":
+        import xxhash
+
+        return xxhash.xxh3_64_intdigest(buffer)
+    if method == "sha256":
+        return int(hashlib.sha256(buffer).hexdigest(), 16)
+    raise ValueError(f"Unknown array hash {method=}.")
+
+
+def _hash_array(array: Any) -> int:
+    config = freeze.array_hash_config
+    method = config["method"]
+    threshold = config["sample_threshold"]
+    num_samples = config["num_samples"]
+    version = arraylib.version(array)
+    key = (version, method, threshold, num_samples)
+
+    if (entry := _array_hash_registry.get(id(array))) and entry[0] == key:
+        return entry[1]
+
+    # hash the array bytes in place without copying to `bytes`
+    buffer = arraylib.tobuffer(array)
+
+    if threshold is not None and buffer.nbytes > threshold:
+        # fingerprint large arrays by hashing evenly strided bytes
+        buffer = buffer[:: -(-buffer.nbytes // num_samples)].tobytes()
+
+    shape, dtype = arraylib.shape(array), str(arraylib.dtype(array))
+    value = hash((tuple(shape), dtype, _hash_buffer(buffer, method)))
+
+    if version is None:
+        return value
+
+    if id(array) not in _array_hash_registry:
+        try:
+            weakref.finalize(array, _array_hash_registry.pop, id(array), None)
+        except TypeError:
+            # not weak referenceable
+            return value
+
+    _array_hash_registry[id(array)] = (key, value)
+    return value
+
+
 class _FrozenArray(_FrozenBase):
     # wrap arrays with a custom wrapper that implements hash and equality
-    # using the wrapped array's bytes representation and sha256 hash function
-    # this is useful to select some array to hold without updating in the process
-    # of training a model.
+    # using the wrapped array's bytes representation and a configurable hash
+    # function. this is useful to select some array to hold without updating
+    # in the process of training a model.
     def __hash__(self) -> int:
-        bytes = arraylib.tobytes(self.__wrapped__)
-        return int(hashlib.sha256(bytes).hexdigest(), 16)
+        return _hash_array(self.__wrapped__)
 
     def __eq__(self, other) -> bool:
         if not isinstance(other, _FrozenArray):
@@ -168,6 +231,16 @@ def freeze(value: T) -> _FrozenBase[T]:
 
 freeze.type_dispatcher = ft.singledispatch(lambda x: _FrozenHashable(x))
 freeze.def_type = freeze.type_dispatcher.register
+# hashing strategy of frozen arrays:
+# - ``method``: ``blake2b`` (default), ``xxhash`` (requires ``xxhash``) or ``sha256``
+# - ``sample_threshold``: arrays with more bytes than the threshold are hashed
+#   using a fingerprint of ``num_samples`` evenly strided bytes instead of all
+#   the bytes. ``None`` to always hash all the bytes.
+freeze.array_hash_config = dict(
+    method="blake2b",
+    sample_threshold=None,
+    num_samples=2**16,
+)
 
 
 @freeze.def_type(arraylib.ndarray)
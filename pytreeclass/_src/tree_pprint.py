@@ -21,27 +21,40 @@ import functools as ft
 import importlib
 import inspect
 import math
+import weakref
 from contextlib import suppress
 from itertools import zip_longest
 from types import FunctionType
-from typing import Any, Callable, Literal, NamedTuple, Sequence
+from typing import Any, Callable, Iterator, Literal, NamedTuple, Sequence
 
-from typing_extensions import TypeAlias, TypedDict, Unpack
+from typing_extensions import NotRequired, TypeAlias, TypedDict, Unpack
 
 from pytreeclass._src.backend import arraylib, treelib
 from pytreeclass._src.tree_util import (
     Node,
+    atomicdef,
     construct_tree,
     is_path_leaf_depth_factory,
-    tree_leaves_with_typed_path,
 )
 
+Stats = Literal["off", "exact", "approx"]
+
+
+class PPBudget:
+    # number of nodes left to render, shared by the nested `pp` calls
+    __slots__ = ["nodes"]
+
+    def __init__(self, nodes: int | float):
+        self.nodes = nodes
+
 
 class PPSpec(TypedDict):
     indent: int
     kind: Literal["REPR", "STR"]
     width: int
     depth: int | float
+    stats: NotRequired[Stats]
+    budget: NotRequired[PPBudget]
 
 
 PyTree = Any
@@ -54,6 +67,38 @@ class ShapeDtypePP(NamedTuple):
     dtype: Any
 
 
+class Text(str):
+    """Rendered ``str`` that carries its one line width.
+
+    The one line width is the length without the newline/tab characters
+    stripped by ``format_width``. It is added up on concatenation, so deciding
+    whether a node fits in one line does not rescan its rendered children.
+    """
+
+    def __new__(cls, text: str, width: int | None = None) -> Text:
+        self = super().__new__(cls, text)
+        self.width = one_line_width(text) if width is None else width
+        return self
+
+    def __add__(self, other: Any) -> Text:
+        if not isinstance(other, str):
+            return NotImplemented
+        width = self.width + one_line_width(other)
+        return Text(str.__add__(self, other), width)
+
+    def __radd__(self, other: Any) -> Text:
+        if not isinstance(other, str):
+            return NotImplemented
+        width = one_line_width(other) + self.width
+        return Text(str.__add__(other, self), width)
+
+
+def one_line_width(text: str) -> int:
+    if isinstance(text, Text):
+        return text.width
+    return len(text) - text.count("\n") - text.count("\t")
+
+
 @ft.singledispatch
 def pp_dispatcher(node: Any, **spec: Unpack[PPSpec]) -> str:
     """Register a new or override an existing pretty printer by type using."""
@@ -84,6 +129,9 @@ def pp(node: Any, **spec: Unpack[PPSpec]) -> str:
     if spec["depth"] < 0:
         return "..."
 
+    if (budget := spec.get("budget")) is not None:
+        budget.nodes -= 1
+
     return format_width(pp_dispatcher(node, **spec), width=spec["width"])
 
 
@@ -94,23 +142,38 @@ def pps(xs: Sequence[Any], pp: PP, **spec: Unpack[PPSpec]) -> str:
     spec["indent"] += 1
     spec["depth"] -= 1
 
-    text = (
-        "\n"
-        + "\t" * spec["indent"]
-        + (", \n" + "\t" * spec["indent"]).join(pp(x, **spec) for x in xs)
-        + "\n"
-        + "\t" * (spec["indent"] - 1)
-    )
-
-    return format_width(text, width=spec["width"])
+    if (budget := spec.get("budget")) is None:
+        texts = [pp(x, **spec) for x in xs]
+    else:
+        # stop rendering the items once the nodes budget is exhausted
+        texts, items = [], iter(xs)
+        for x in items:
+            if budget.nodes <= 0:
+                if hasattr(xs, "__len__"):
+                    rest = len(xs) - len(texts)
+                else:
+                    rest = 1 + sum(1 for _ in items)
+                texts += [f"...({rest} more)"]
+                break
+            texts += [pp(x, **spec)]
+    indent = "\t" * spec["indent"]
+    text = "".join(["\n", indent, (", \n" + indent).join(texts), "\n", indent[1:]])
+    if any(isinstance(text, Text) for text in texts):
+        # sum the carried widths instead of rescanning the expanded children
+        width = sum(map(one_line_width, texts)) + 2 * max(len(texts) - 1, 0)
+    else:
+        width = one_line_width(text)
+    if width > spec["width"]:
+        return Text(text, width)
+    return text.replace("\n", "").replace("\t", "")
 
 
 def key_value_pp(x: tuple[str, Any], **spec: Unpack[PPSpec]) -> str:
-    return f"{x[0]}:{pp(x[1], **spec)}"
+    return f"{x[0]}:" + pp(x[1], **spec)
 
 
 def attr_value_pp(x: tuple[str, Any], **spec: Unpack[PPSpec]) -> str:
-    return f"{x[0]}={pp(x[1], **spec)}"
+    return f"{x[0]}=" + pp(x[1], **spec)
 
 
 @pp_dispatcher.register(ShapeDtypePP)
@@ -139,11 +202,19 @@ def array_pp(node: arraylib.ndarray, **spec: Unpack[PPSpec]) -> str:
     if arraylib.size(node) == 0:
         return base
 
+    if (stats := spec.get("stats", "exact")) == "off":
+        return base
+
     # Extended repr for numpy array, with extended information
     # this part of the function is inspired by
     # lovely-jax https://github.com/xl0/lovely-jax
 
-    low, high = arraylib.min(node), arraylib.max(node)
+    size = arraylib.size(node)
+    stride = -(-size // STATS_SAMPLE_SIZE) if stats == "approx" else 1
+    low, high, mean, std = array_stats(node, stride)
+    # sampled statistics are approximate
+    eq, approx = ("=", "") if stride == 1 else ("≈", "≈")
+
     interval = "(" if math.isinf(low) else "["
     interval += (
         f"{low},{high}" if arraylib.is_integer(node) else f"{low:.2f},{high:.2f}"
@@ -151,8 +222,34 @@ def array_pp(node: arraylib.ndarray, **spec: Unpack[PPSpec]) -> str:
     interval += ")" if math.isinf(high) else "]"
     interval = interval.replace("inf", "∞")
 
-    mean, std = f"{arraylib.mean(node):.2f}", f"{arraylib.std(node):.2f}"
-    return f"{base}(μ={mean}, σ={std}, ∈{interval})"
+    mean, std = f"{mean:.2f}", f"{std:.2f}"
+    return f"{base}(μ{eq}{mean}, σ{eq}{std}, ∈{approx}{interval})"
+
+
+# arrays with more elements are sampled with a stride under the `approx` stats
+STATS_SAMPLE_SIZE = 2**16
+
+# (id, stride) -> (array weakref, array version, stats) of the printed arrays,
+# entries are removed once their array is garbage collected
+_stats_cache: dict[tuple[int, int], tuple[weakref.ref, int, tuple]] = {}
+
+
+def array_stats(node: arraylib.ndarray, stride: int) -> tuple[Any, Any, Any, Any]:
+    # the statistics of immutable (or version tracked) arrays are cached by
+    # identity, so repeated reprs (e.g. in error messages) do not recompute them
+    if (version := arraylib.version(node)) is None:
+        return arraylib.stats(node, stride)
+
+    key = (id(node), stride)
+    entry = _stats_cache.get(key)
+    if entry is not None and entry[0]() is node and entry[1] == version:
+        return entry[2]
+
+    stats = arraylib.stats(node, stride)
+    with suppress(TypeError):  # not weak referenceable
+        ref = weakref.ref(node, lambda _: _stats_cache.pop(key, None))
+        _stats_cache[key] = (ref, version, stats)
+    return stats
 
 
 @pp_dispatcher.register(FunctionType)
@@ -216,6 +313,8 @@ def tree_repr(
     width: int = 80,
     tabwidth: int = 2,
     depth: int | float = float("inf"),
+    stats: Stats | None = None,
+    budget: int | float | None = None,
 ) -> str:
     """Prertty print arbitrary pytrees ``__repr__``.
 
@@ -224,6 +323,16 @@ def tree_repr(
         width: max width of the repr string.
         tabwidth: tab width of the repr string.
         depth: max depth of the repr string.
+        stats: statistics (mean, std, min and max) of the numerical arrays.
+            ``off`` to skip them, ``exact`` to compute them over all elements,
+            or ``approx`` to compute them over a strided sample of the arrays
+            with more than ``2**16`` elements (marked with ``≈``). defaults to
+            ``tree_repr.stats`` (``exact``), which can be set to change the
+            ``repr`` of all the trees (e.g. ``TreeClass`` instances).
+        budget: max number of nodes to render. the remaining items of a node
+            are elided as ``...(n more)`` once exhausted, bounding the cost of
+            the repr of large trees by the output size. defaults to
+            ``tree_repr.budget`` (no limit).
 
     Example:
         >>> import pytreeclass as tc
@@ -238,9 +347,28 @@ def tree_repr(
 
         >>> print(tc.tree_repr(tree, depth=2))
         {a:1, b:[2, 3], c:{d:4, e:5}, f:i32[2](μ=6.50, σ=0.50, ∈[6,7])}
+
+        >>> print(tc.tree_repr(tree, depth=1, stats="off"))
+        {a:1, b:[...], c:{...}, f:i32[2]}
+
+        >>> print(tc.tree_repr(jnp.arange(10**6) / 10**6, stats="approx"))
+        f32[1000000](μ≈0.50, σ≈0.29, ∈≈[0.00,1.00])
+
+        >>> print(tc.tree_repr(list(range(100)), budget=5))
+        [0, 1, 2, 3, ...(96 more)]
     """
-    text = pp(tree, indent=0, kind="REPR", width=width, depth=depth)
-    return text.expandtabs(tabwidth)
+    stats = tree_repr.stats if stats is None else stats
+    if stats not in ("off", "exact", "approx"):
+        raise ValueError(f"`stats` must be `off`, `exact` or `approx`, got {stats!r}")
+    spec = dict(indent=0, kind="REPR", width=width, depth=depth, stats=stats)
+    budget = tree_repr.budget if budget is None else budget
+    if budget != float("inf"):
+        spec.update(budget=PPBudget(budget))
+    return pp(tree, **spec).expandtabs(tabwidth)
+
+
+tree_repr.stats = "exact"
+tree_repr.budget = float("inf")
 
 
 def tree_str(
@@ -249,6 +377,7 @@ def tree_str(
     width: int = 80,
     tabwidth: int = 2,
     depth: int | float = float("inf"),
+    budget: int | float | None = None,
 ) -> str:
     """Prertty print arbitrary pytrees ``__str__``.
 
@@ -257,6 +386,9 @@ def tree_str(
         width: max width of the str string.
         tabwidth: tab width of the repr string.
         depth: max depth of the repr string.
+        budget: max number of nodes to render. the remaining items of a node
+            are elided as ``...(n more)`` once exhausted. defaults to
+            ``tree_str.budget`` (no limit).
 
     Example:
         >>> import pytreeclass as tc
@@ -268,9 +400,18 @@ def tree_str(
 
         >>> print(tc.tree_str(tree, depth=2))
         {a:1, b:[2, 3], c:{d:4, e:5}, f:[6 7]}
+
+        >>> print(tc.tree_str(tree, budget=4))
+        {a:1, b:[2, ...(1 more)], ...(2 more)}
     """
-    text = pp(tree, indent=0, kind="STR", width=width, depth=depth)
-    return text.expandtabs(tabwidth)
+    spec = dict(indent=0, kind="STR", width=width, depth=depth)
+    budget = tree_str.budget if budget is None else budget
+    if budget != float("inf"):
+        spec.update(budget=PPBudget(budget))
+    return pp(tree, **spec).expandtabs(tabwidth)
+
+
+tree_str.budget = float("inf")
 
 
 def tree_diagram(
@@ -318,18 +459,51 @@ def tree_diagram(
             ├── [1]=30
             └── [2]=A(...)
     """
+    text = "\n".join(
+        tree_diagram_lines(tree, depth=depth, is_leaf=is_leaf, tabwidth=tabwidth)
+    )
+    return text.rstrip()
+
+
+def tree_diagram_lines(
+    tree: Any,
+    *,
+    depth: int | float = float("inf"),
+    is_leaf: Callable[[Any], None] | None = None,
+    tabwidth: int = 4,
+) -> Iterator[str]:
+    """Iterate over the lines of ``tree_diagram``.
+
+    Lines are generated one node at a time, so large diagrams can be written
+    to a file without building the whole string.
+
+    Example:
+        >>> import pytreeclass as tc
+        >>> for line in tc.tree_diagram.iter_lines([1, [2, 3]]):
+        ...     print(line)
+        list
+        ├── [0]=1
+        └── [1]:list
+            ├── [0]=2
+            └── [1]=3
+    """
+    is_path_leaf = is_path_leaf_depth_factory(depth)
+    root = construct_tree(tree, is_leaf=is_leaf, is_path_leaf=is_path_leaf)
+    return _diagram_lines(root, tabwidth)
+
+
+def _diagram_lines(root: Node, tabwidth: int) -> Iterator[str]:
     vmark = ("│\t")[:tabwidth]  # vertical mark
     lmark = ("└" + "─" * (tabwidth - 2) + (" \t"))[:tabwidth]  # last mark
     cmark = ("├" + "─" * (tabwidth - 2) + (" \t"))[:tabwidth]  # connector mark
     smark = (" \t")[:tabwidth]  # space mark
 
-    def step(
-        node: Node,
-        depth: int = 0,
-        is_last: bool = False,
-        is_lasts: tuple[bool, ...] = (),
-    ) -> str:
-        indent = "".join(smark if is_last else vmark for is_last in is_lasts[:-1])
+    # the indent of each node is its parent indent extended by one mark
+    # instead of being rebuilt from all the ancestors
+    stack = [(root, 0, len(root.children) == 1, "")]
+
+    while stack:
+        node, depth, is_last, indent = stack.pop()
         branch = (lmark if is_last else cmark) if depth > 0 else ""
 
         if (child_count := len(node.children)) == 0:
@@ -337,27 +511,22 @@ def tree_diagram(
             text = f"{indent}"
             text += f"{branch}{key}=" if key is not None else ""
             text += tree_repr(value, depth=0)
-            return text + "\n"
-
-        (key, type), _ = node.data
+        else:
+            (key, type), _ = node.data
+            text = f"{indent}{branch}"
+            text += f"{key}:" if key is not None else ""
+            text += f"{type.__name__}"
 
-        text = f"{indent}{branch}"
-        text += f"{key}:" if key is not None else ""
-        text += f"{type.__name__}\n"
+            if depth > 0:
+                indent += smark if is_last else vmark
 
-        for i, child in enumerate(node.children.values()):
-            text += step(
-                child,
-                depth=depth + 1,
-                is_last=(i == child_count - 1),
-                is_lasts=is_lasts + (i == child_count - 1,),
-            )
-        return text
+            children = enumerate(node.children.values())
+            stack += [
+                (child, depth + 1, i == child_count - 1, indent)
+                for i, child in reversed(list(children))
+            ]
 
-    is_path_leaf = is_path_leaf_depth_factory(depth)
-    root = construct_tree(tree, is_leaf=is_leaf, is_path_leaf=is_path_leaf)
-    text = step(root, is_last=len(root.children) == 1)
-    return (text if tabwidth is None else text.expandtabs(tabwidth)).rstrip()
+        yield text if tabwidth is None else text.expandtabs(tabwidth)
 
 
 def tree_mermaid(
@@ -388,33 +557,50 @@ def tree_mermaid(
         - Copy the output and paste it in the mermaid live editor to interact with
           the diagram. https://mermaid.live
     """
+    text = "\n".join(
+        tree_mermaid_lines(tree, depth=depth, is_leaf=is_leaf, tabwidth=tabwidth)
+    )
+    return text.rstrip()
+
+
+def tree_mermaid_lines(
+    tree: PyTree,
+    depth: int | float = float("inf"),
+    is_leaf: Callable[[Any], None] | None = None,
+    tabwidth: int | None = 4,
+) -> Iterator[str]:
+    """Iterate over the lines of ``tree_mermaid`` without building the string."""
+    is_path_leaf = is_path_leaf_depth_factory(depth)
+    root = construct_tree(tree, is_leaf=is_leaf, is_path_leaf=is_path_leaf)
+    return _mermaid_lines(root, tabwidth)
+
+
+def _mermaid_lines(root: Node, tabwidth: int | None) -> Iterator[str]:
+    def expand(text: str) -> str:
+        return text.expandtabs(tabwidth) if tabwidth is not None else text
+
+    yield "flowchart LR"
+    stack = [root]
+
+    while stack:
+        node = stack.pop()
 
-    def step(node: Node, depth: int = 0) -> str:
         if len(node.children) == 0:
             (key, _), value = node.data
             ppstr = f"{key}=" if key is not None else ""
             ppstr += tree_repr(value, depth=0)
             ppstr = "<b>" + ppstr + "</b>"
-            return f'\tid{id(node.parent)} --- id{id(node)}("{ppstr}")\n'
-
-        (key, type), _ = node.data
-        ppstr = f"{key}:" if key is not None else ""
-        ppstr += f"{type.__name__}"
-        ppstr = "<b>" + ppstr + "</b>"
+        else:
+            (key, type), _ = node.data
+            ppstr = f"{key}:" if key is not None else ""
+            ppstr += f"{type.__name__}"
+            ppstr = "<b>" + ppstr + "</b>"
+            stack += reversed(node.children.values())
 
         if node.parent is None:
-            text = f'\tid{id(node)}("{ppstr}")\n'
+            yield expand(f'\tid{id(node)}("{ppstr}")')
         else:
-            text = f'\tid{id(node.parent)} --- id{id(node)}("{ppstr}")\n'
-
-        for child in node.children.values():
-            text += step(child, depth=depth + 1)
-        return text
-
-    is_path_leaf = is_path_leaf_depth_factory(depth)
-    root = construct_tree(tree, is_leaf=is_leaf, is_path_leaf=is_path_leaf)
-    text = "flowchart LR\n" + step(root)
-    return (text.expandtabs(tabwidth) if tabwidth is not None else text).rstrip()
+            yield expand(f'\tid{id(node.parent)} --- id{id(node)}("{ppstr}")')
 
 
 # dispatcher for dot nodestyles
@@ -457,8 +643,33 @@ def tree_graph(
 
         .. image:: ../_static/tree_graph_stylized.svg
     """
+    text = "\n".join(
+        tree_graph_lines(tree, depth=depth, is_leaf=is_leaf, tabwidth=tabwidth)
+    )
+    return text.rstrip()
+
 
-    def step(node: Node, depth: int = 0) -> str:
+def tree_graph_lines(
+    tree: PyTree,
+    depth: int | float = float("inf"),
+    is_leaf: Callable[[Any], None] | None = None,
+    tabwidth: int | None = 4,
+) -> Iterator[str]:
+    """Iterate over the lines of ``tree_graph`` without building the string."""
+    is_path_leaf = is_path_leaf_depth_factory(depth)
+    root = construct_tree(tree, is_leaf=is_leaf, is_path_leaf=is_path_leaf)
+    return _graph_lines(root, tabwidth)
+
+
+def _graph_lines(root: Node, tabwidth: int | None) -> Iterator[str]:
+    def expand(text: str) -> str:
+        return text.expandtabs(tabwidth) if tabwidth is not None else text
+
+    yield "digraph G {"
+    stack = [root]
+
+    while stack:
+        node = stack.pop()
         (key, type), value = node.data
 
         # dispatch node style
@@ -467,37 +678,30 @@ def tree_graph(
         if len(node.children) == 0:
             ppstr = f"{key}=" if key is not None else ""
             ppstr += tree_repr(value, depth=0)
-            text = f'\t{id(node)} [label="{ppstr}", {style}];\n'
-            text += f"\t{id(node.parent)} -> {id(node)};\n"
-            return text
-
-        ppstr = f"{key}:" if key is not None else ""
-        ppstr += f"{type.__name__}"
-
-        if node.parent is None:
-            text = f'\t{id(node)} [label="{ppstr}", {style}];\n'
         else:
-            text = f'\t{id(node)} [label="{ppstr}", {style}];\n'
-            text += f"\t{id(node.parent)} -> {id(node)};\n"
+            ppstr = f"{key}:" if key is not None else ""
+            ppstr += f"{type.__name__}"
+            stack += reversed(node.children.values())
 
-        for child in node.children.values():
-            text += step(child, depth=depth + 1)
-        return text
+        yield expand(f'\t{id(node)} [label="{ppstr}", {style}];')
+        if node.parent is not None or len(node.children) == 0:
+            yield expand(f"\t{id(node.parent)} -> {id(node)};")
 
-    is_path_leaf = is_path_leaf_depth_factory(depth)
-    root = construct_tree(tree, is_leaf=is_leaf, is_path_leaf=is_path_leaf)
-    text = "digraph G {\n" + step(root) + "}"
-    return (text.expandtabs(tabwidth) if tabwidth is not None else text).rstrip()
+    yield "}"
 
 
 tree_graph.def_nodestyle = dot_dispatcher.register
+tree_graph.iter_lines = tree_graph_lines
+tree_diagram.iter_lines = tree_diagram_lines
+tree_mermaid.iter_lines = tree_mermaid_lines
 
 
 def format_width(string, width=60):
     """Strip newline/tab characters if less than max width."""
-    children_length = len(string) - string.count("\n") - string.count("\t")
+    # multi-line strings carry their one line width in `Text`
+    children_length = one_line_width(string)
     if children_length > width:
-        return string
+        return string if isinstance(string, Text) else Text(string, children_length)
     return string.replace("\n", "").replace("\t", "")
 
 
@@ -510,6 +714,8 @@ def _table(rows: list[Row]) -> str:
     """Generate a table from a list of rows."""
 
     def line(text: Row, widths: list[int]) -> str:
+        if not any("\n" in col for col in text):
+            return "│" + "│".join(map(str.ljust, text, widths)) + "│"
         return "\n".join(
             "│"
             + "│".join(col.ljust(width) for col, width in zip(line_row, widths))
@@ -545,6 +751,9 @@ def tree_summary(
 ) -> str:
     """Print a summary of an arbitrary pytree.
 
+    Use ``tree_summary.iter_rows`` to iterate over the rows of large trees
+    without building the table.
+
     Args:
         tree: a registered pytree to summarize.
         depth: max depth to display the tree. defaults to maximum depth.
@@ -601,36 +810,102 @@ def tree_summary(
         └────┴────┴─────┴─────┘
     """
     rows = [["Name", "Type", "Count", "Size"]]
-    tcount = tsize = 0
+    rows += tree_summary_rows(tree, depth=depth, is_leaf=is_leaf)
+    return _table(rows)
 
-    traces_leaves = tree_leaves_with_typed_path(
-        tree,
-        is_leaf=is_leaf,
-        is_path_leaf=is_path_leaf_depth_factory(depth),
-    )
 
-    for trace, leaf in traces_leaves:
-        tcount += (count := tree_count(leaf))
-        tsize += (size := tree_size(leaf))
+def tree_summary_rows(
+    tree: PyTree,
+    *,
+    depth: int | float = float("inf"),
+    is_leaf: Callable[[Any], None] | None = None,
+) -> Iterator[Row]:
+    """Iterate over the rows of ``tree_summary`` without building the table.
+
+    The count and size of each row are computed once from its subtree leaves and
+    accumulated for the last ``Σ`` row, so rows can be streamed (e.g. written to
+    a file) for trees too large to tabulate.
+
+    Args:
+        tree: a registered pytree to summarize.
+        depth: max depth to display the tree. defaults to maximum depth.
+        is_leaf: function to determine if a node is a leaf. defaults to None
+
+    Example:
+        >>> import pytreeclass as tc
+        >>> tree = {"a": "x", "b": [2.0, 3.0]}
+        >>> for row in tc.tree_summary.iter_rows(tree, depth=1):
+        ...     print(row)
+        ["['a']", 'str', '1', '']
+        ["['b']", 'list', '2', '']
+        ['Σ', 'dict', '3', '']
+    """
+    if depth is None:
+        depth = float("inf")
+    if not isinstance(depth, (int, float)):
+        raise TypeError(f"`depth` must be an `int` or `float`, got {type(depth)}")
+    return _summary_rows(tree, depth, is_leaf)
+
 
-        if trace == ((), ()):
-            # avoid printing the leaf trace (which is the root of the tree)
-            # twice, once as a leaf and once as the root at the end
-            continue
+def _summary_rows(
+    tree: PyTree,
+    depth: int | float,
+    is_leaf: Callable[[Any], None] | None,
+) -> Iterator[Row]:
+    type_dispatcher = tree_summary.type_dispatcher
+    count_dispatcher = tree_summary.count_dispatcher
+    size_dispatcher = tree_summary.size_dispatcher
+    key_strs: dict[Any, str] = {}
+    tcount = tsize = 0
+
+    def key_pp(key: Any) -> str:
+        # path keys are repeated across sibling subtrees
+        try:
+            return key_strs[key]
+        except KeyError:
+            text = key_strs[key] = tree_repr(key)
+            return text
+        except TypeError:  # unhashable key
+            return tree_repr(key)
 
-        paths, _ = trace
-        pstr = "".join(tree_repr(path) for path in paths)
-        tstr = tree_summary.type_dispatcher(leaf)
+    def row(path: Sequence[Any], node: Any, count: int, size: int) -> Row:
+        pstr = "".join(map(key_pp, path))
+        tstr = type_dispatcher(node)
         cstr = f"{count:,}" if count else ""
         sstr = size_pp(size) if size else ""
-        rows += [[pstr, tstr, cstr, sstr]]
-
-    pstr = "Σ"
-    tstr = tree_summary.type_dispatcher(tree)
-    cstr = f"{tcount:,}" if tcount else ""
-    sstr = size_pp(tsize) if tsize else ""
-    rows += [[pstr, tstr, cstr, sstr]]
-    return _table(rows)
+        return [pstr, tstr, cstr, sstr]
+
+    if depth == float("inf"):
+        # every row is a leaf of the tree: flatten once
+        for path, leaf in treelib.tree_path_flatten(tree, is_leaf=is_leaf)[0]:
+            if is_leaf is not None and is_leaf(leaf):
+                count, size = tree_count_size(leaf)
+            else:
+                count, size = count_dispatcher(leaf), size_dispatcher(leaf)
+            tcount, tsize = tcount + count, tsize + size
+            # avoid printing the root leaf twice, once as a leaf and once as Σ
+            if path:
+                yield row(path, leaf, count, size)
+    else:
+        # walk one level at a time down to `depth`, then summarize each
+        # remaining subtree with a single flatten
+        stack = [((), tree)]
+        while stack:
+            path, node = stack.pop()
+            if (is_leaf and is_leaf(node)) or depth <= len(path):
+                count, size = tree_count_size(node)
+            else:
+                is_child = lambda child: child is not node
+                children, treedef = treelib.tree_path_flatten(node, is_leaf=is_child)
+                if treedef != atomicdef:
+                    stack += [((*path, *key), child) for key, child in children][::-1]
+                    continue
+                count, size = count_dispatcher(node), size_dispatcher(node)
+            tcount, tsize = tcount + count, tsize + size
+            if path:
+                yield row(path, node, count, size)
+
+    yield row(["Σ"], tree, tcount, tsize)
 
 
 tree_summary.count_dispatcher = ft.singledispatch(lambda x: 1)
@@ -639,14 +914,20 @@ tree_summary.size_dispatcher = ft.singledispatch(lambda x: 0)
 tree_summary.def_size = tree_summary.size_dispatcher.register
 tree_summary.type_dispatcher = ft.singledispatch(lambda x: type(x).__name__)
 tree_summary.def_type = tree_summary.type_dispatcher.register
+tree_summary.iter_rows = tree_summary_rows
 
 
 @tree_summary.def_type(arraylib.ndarray)
 def tree_summary_array(node: Any) -> str:
     """Return the type repr of the node."""
-    shape_dype = node.shape, node.dtype
+    return shape_dtype_str(tuple(node.shape), node.dtype)
+
+
+@ft.lru_cache(maxsize=256)
+def shape_dtype_str(shape: tuple[int, ...], dtype: Any) -> str:
+    # summaries of large models repeat the same few shape/dtype pairs
     spec = dict(indent=0, kind="REPR", width=80, depth=float("inf"))
-    return pp(ShapeDtypePP(*shape_dype), **spec)
+    return pp(ShapeDtypePP(shape, dtype), **spec)
 
 
 @tree_summary.def_count(arraylib.ndarray)
@@ -659,20 +940,15 @@ def tree_summary_array_size(node: arraylib.ndarray) -> int:
     return node.nbytes
 
 
-def tree_size(tree: PyTree) -> int:
-    def reduce_func(acc, node):
-        return acc + tree_summary.size_dispatcher(node)
-
-    leaves, _ = treelib.tree_flatten(tree)
-    return ft.reduce(reduce_func, leaves, 0)
-
-
-def tree_count(tree: PyTree) -> int:
-    def reduce_func(acc, node):
-        return acc + tree_summary.count_dispatcher(node)
-
-    leaves, _ = treelib.tree_flatten(tree)
-    return ft.reduce(reduce_func, leaves, 0)
+def tree_count_size(tree: PyTree) -> tuple[int, int]:
+    """Return the total count and size of the tree leaves in one flatten."""
+    count_dispatcher = tree_summary.count_dispatcher
+    size_dispatcher = tree_summary.size_dispatcher
+    count = size = 0
+    for leaf in treelib.tree_flatten(tree)[0]:
+        count += count_dispatcher(leaf)
+        size += size_dispatcher(leaf)
+    return count, size
 
 
 if importlib.util.find_spec("jax"):
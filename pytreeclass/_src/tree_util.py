@@ -45,9 +45,16 @@ def tree_hash(*trees: PyTree) -> int:
     return hash((*leaves, treedef))
 
 
+def _leaf_copy(leaf: Any) -> Any:
+    # immutable arrays (e.g. jax arrays) are shared instead of copied
+    if isinstance(leaf, arraylib.ndarray) and not arraylib.is_mutable(leaf):
+        return leaf
+    return copy(leaf)
+
+
 def tree_copy(tree: T) -> T:
     """Return a copy of the tree."""
-    return treelib.tree_map(lambda x: copy(x), tree)
+    return treelib.tree_map(_leaf_copy, tree)
 
 
 def _is_leaf_rhs_equal(leaf, rhs) -> bool | arraylib.ndarray:
@@ -58,9 +65,10 @@ def _is_leaf_rhs_equal(leaf, rhs) -> bool | arraylib.ndarray:
             if leaf.dtype != rhs.dtype:
                 return False
             try:
-                return bool(verdict := arraylib.all(leaf == rhs))
+                # compare without allocating a full boolean array if possible
+                return arraylib.array_equal(leaf, rhs)
             except Exception:
-                return verdict  # fail under `jit`
+                return arraylib.all(leaf == rhs)  # fail under `jit`
         return False
     return leaf == rhs
 
@@ -73,16 +81,32 @@ def is_tree_equal(*trees: Any) -> bool | arraylib.ndarray:
 
     Note:
         Under boolean ``Array`` if compiled otherwise ``bool``.
+
+    Note:
+        The comparison returns ``False`` on the first mismatching leaf, and
+        identical trees or leaves are considered equal without comparing
+        their values.
     """
     tree0, *rest = trees
     leaves0, treedef0 = treelib.tree_flatten(tree0)
     verdict = True
 
     for tree in rest:
+        if tree is tree0:
+            continue
         leaves, treedef = treelib.tree_flatten(tree)
-        if (treedef != treedef0) or verdict is False:
+        if treedef != treedef0:
             return False
-        verdict = ft.reduce(op.and_, map(_is_leaf_rhs_equal, leaves0, leaves), verdict)
+        for leaf0, leaf in zip(leaves0, leaves):
+            if leaf0 is leaf:
+                continue
+            leaf_verdict = _is_leaf_rhs_equal(leaf0, leaf)
+            try:
+                if not leaf_verdict:
+                    return False
+            except Exception:
+                # under `jit` or non-scalar verdicts, combine the verdicts
+                verdict = op.and_(verdict, leaf_verdict)
     return verdict
 
 
@@ -481,30 +505,38 @@ def construct_tree(
     is_leaf: Callable[[Any], bool] | None = None,
     is_path_leaf: Callable[[KeyTypePath], bool] | None = None,
 ) -> Node:
-    # construct a tree with `Node` objects using `tree_leaves_with_typed_path`
-    # to establish parent-child relationship between nodes
-
-    traces_leaves = tree_leaves_with_typed_path(
-        tree,
-        is_leaf=is_leaf,
-        is_path_leaf=is_path_leaf,
-    )
-
-    ti = (None, type(tree))
-    vi = tree
-    root = Node(data=(ti, vi))
-
-    for trace, leaf in traces_leaves:
-        keys, types = trace
-        cur = root
-        for i, ti in enumerate(zip(keys, types)):
-            if ti in cur:
-                # common parent node
-                cur = cur.children[ti]
-            else:
-                # new path
-                vi = leaf if i == len(keys) - 1 else None
-                child = Node(data=(ti, vi))
-                cur.add_child(child)
-                cur = child
+    # construct a tree with `Node` objects by walking the tree one level at a
+    # time with an explicit stack. a node is attached to its parent only once
+    # a leaf is found beneath it, so subtrees without leaves are dropped
+    # as in the leaves typed paths of `tree_leaves_with_typed_path`
+    root = Node(data=((None, type(tree)), tree))
+    stack = [(root, ((), ()), tree)]
+
+    while stack:
+        node, typedpath, value = stack.pop()
+
+        if (is_leaf and is_leaf(value)) or (is_path_leaf and is_path_leaf(typedpath)):
+            children, treedef = (), atomicdef
+        else:
+            one_level_is_leaf = lambda child: child is not value
+            children, treedef = treelib.tree_path_flatten(
+                value, is_leaf=one_level_is_leaf
+            )
+
+        if treedef == atomicdef:
+            # leaf node: attach the unattached ancestors
+            node.data = (node.data[0], value)
+            while (parent := node.parent) is not None:
+                ti, __ = node.data
+                if ti in parent.children:
+                    break
+                parent.children[ti] = node
+                node = parent
+            continue
+
+        keys, types = typedpath
+        for key, child in reversed(children):
+            path = ((*keys, *key), (*types, type(child)))
+            ti = (path[0][-1], type(child))
+            stack += [(Node(data=(ti, None), parent=node), path, child)]
     return root
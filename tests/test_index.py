@@ -15,7 +15,7 @@
 
 import re
 from collections import namedtuple
-from typing import NamedTuple
+from typing import Any, NamedTuple
 
 import pytest
 
@@ -566,3 +566,696 @@ def test_repr_str():
     assert repr(t.at["a"]) == "TreeClassIndexer(tree=Tree(a=1, b=2), where=('a',))"
     assert str(t.at["a"]) == "TreeClassIndexer(tree=Tree(a=1, b=2), where=('a',))"
     assert repr(t.at[...]) == "TreeClassIndexer(tree=Tree(a=1, b=2), where=(Ellipsis,))"
+
+
+def test_where_plan_cache():
+    AtIndexer.cache_clear()
+    tree = dict(a=1, b=dict(c=2, d=3), e=4)
+
+    assert AtIndexer(tree)["b"]["c"].get() == dict(a=None, b=dict(c=2, d=None), e=None)
+    assert AtIndexer.cache_info().misses == 1
+    # same structure different leaves
+    tree2 = dict(a=10, b=dict(c=20, d=30), e=40)
+    assert AtIndexer(tree2)["b"]["c"].set(0) == dict(a=10, b=dict(c=0, d=30), e=40)
+    assert AtIndexer.cache_info().hits == 1
+    # different structure
+    tree3 = dict(a=1, b=dict(c=2), e=4)
+    assert AtIndexer(tree3)["b"]["c"].get() == dict(a=None, b=dict(c=2), e=None)
+    assert AtIndexer.cache_info().misses == 2
+
+    # type tagged keys
+    with pytest.raises(NotImplementedError):
+        AtIndexer([1, 2])[1.0].get()
+    assert AtIndexer([1, 2])[1].get() == [None, 2]
+
+    # no match is raised on cache hits as well
+    for _ in range(2):
+        with pytest.raises(LookupError):
+            AtIndexer(tree)["x"].get()
+
+    AtIndexer.cache_clear()
+    assert AtIndexer.cache_info().currsize == 0
+
+
+def test_where_plan_cache_not_used_with_masks():
+    AtIndexer.cache_clear()
+    tree = [1, 2, 3]
+    assert AtIndexer(tree)[[True, False, True]].get() == [1, None, 3]
+    assert AtIndexer(tree)[[False, False, True]].get() == [None, None, 3]
+    assert AtIndexer.cache_info().currsize == 0
+
+
+def test_where_plan_cache_lru_bound():
+    from pytreeclass._src.backend.treelib.base import LRUCache
+
+    cache = LRUCache(maxsize=2)
+    cache["a"], cache["b"] = 1, 2
+    assert cache.get("a") == 1
+    cache["c"] = 3
+    # `b` is the least recently used
+    assert cache.get("b") is None
+    assert cache.info().currsize == 2
+
+
+def test_sparse_selection():
+    calls = []
+
+    def func(leaf):
+        calls.append(leaf)
+        return leaf * 10
+
+    leaves = [object() for _ in range(5)]
+    tree = dict(a=1, b=leaves, c=dict(d=2, e=3))
+    out = AtIndexer(tree)["c"]["d"].apply(func)
+    # only the selected leaf is visited
+    assert calls == [2]
+    assert out == dict(a=1, b=leaves, c=dict(d=20, e=3))
+    # unselected leaves are passed as is
+    assert all(x is y for x, y in zip(out["b"], leaves))
+
+
+@pytest.mark.skipif(backend == "default", reason="no array backend installed")
+def test_sparse_selection_path_and_mask():
+    tree = dict(a=arraylib.array([1, 2, 3]), b=arraylib.array([4, 5, 6]))
+    mask = dict(a=arraylib.array([True, False, True]), b=arraylib.array([True] * 3))
+    out = AtIndexer(tree)["a"][mask].set(0)
+    assert is_tree_equal(out, dict(a=arraylib.array([0, 2, 0]), b=tree["b"]))
+    # leaves outside the path selection are not selected by the mask
+    out = AtIndexer(tree)["a"][mask].get()
+    assert is_tree_equal(out, dict(a=arraylib.array([1, 3]), b=None))
+
+
+def test_path_trie_matcher():
+    from pytreeclass._src.tree_index import (
+        EllipsisKey,
+        NameKey,
+        _build_path_trie,
+        _generate_path_indices,
+    )
+
+    tree = dict(a=[1, 2], b=dict(weight=3, bias=4), c=dict(weight=5), d=6)
+    paths = [path for path, _ in treelib.tree_path_flatten(tree)[0]]
+    root = _build_path_trie(paths)
+    assert (root.start, root.stop) == (0, len(paths))
+    assert [(node.start, node.stop) for node in root.children] == [
+        (0, 2),
+        (2, 4),
+        (4, 5),
+        (5, 6),
+    ]
+
+    calls = []
+
+    class CountingKey(BaseKey):
+        def __init__(self, name):
+            self.name = name
+
+        def __eq__(self, entry):
+            calls.append(entry)
+            return NameKey(self.name) == entry
+
+    # the first level prunes all the subtrees except `b`
+    where = (CountingKey("b"), EllipsisKey(...))
+    assert _generate_path_indices(tree, where, None) == (2, 3)
+    assert len(calls) == 4
+
+    # the key is evaluated once per distinct key entry at each level
+    # i.e. `weight` under `b` and `c` is evaluated once
+    calls.clear()
+    where = (EllipsisKey(...), CountingKey("weight"))
+    assert _generate_path_indices(tree, where, None) == (3, 4)
+    assert len(calls) == 4
+
+    # leaves with shorter paths than `where` are not matched
+    assert _generate_path_indices(tree, (NameKey("d"), EllipsisKey(...)), None) == ()
+
+
+def test_flatten_once(monkeypatch):
+    # count the traversals of the indexed tree per operation
+    counts = dict(flatten=0, path_flatten=0)
+    tree_flatten = treelib.tree_flatten
+    tree_path_flatten = treelib.tree_path_flatten
+
+    def counting_flatten(tree, *args, **kwargs):
+        counts["flatten"] += tree is target
+        return tree_flatten(tree, *args, **kwargs)
+
+    def counting_path_flatten(tree, *args, **kwargs):
+        counts["path_flatten"] += tree is target
+        return tree_path_flatten(tree, *args, **kwargs)
+
+    monkeypatch.setattr(treelib, "tree_flatten", staticmethod(counting_flatten))
+    monkeypatch.setattr(
+        treelib, "tree_path_flatten", staticmethod(counting_path_flatten)
+    )
+
+    target = dict(a=1, b=[2, 3], c=dict(d=4))
+    value = dict(a=10, b=[20, 30], c=dict(d=40))
+    indexer = AtIndexer(target)["b"]
+    AtIndexer.cache_clear()
+    # the path is compiled with a path flatten on the first call only
+    indexer.get()
+    assert counts == dict(flatten=1, path_flatten=1)
+
+    for op in (
+        lambda: indexer.get(),
+        lambda: indexer.set(100),
+        lambda: indexer.set(value),
+        lambda: indexer.apply(lambda x: x + 1),
+        lambda: indexer.scan(lambda x, s: (x, s), None),
+        lambda: indexer.reduce(lambda x, y: x + y),
+    ):
+        counts.update(flatten=0, path_flatten=0)
+        op()
+        assert counts == dict(flatten=1, path_flatten=0)
+
+
+@pytest.mark.benchmark(group="indexer")
+def test_benchmark_indexer_set(benchmark):
+    tree = dict(a=[1] * 1_000, b=[dict(c=2, d=3) for _ in range(1_000)])
+    indexer = AtIndexer(tree)["b"][...]["c"]
+    benchmark(lambda: indexer.set(10))
+
+
+def test_batch():
+    tree = dict(a=1, b=[1, 2, 3], c=dict(d=4, e=5))
+    func = lambda x: x + 1
+    chained = AtIndexer(tree)["a"].set(100)
+    chained = AtIndexer(chained)["b"].apply(func)
+    chained = AtIndexer(chained)["c"]["d"].set(400)
+    chained = AtIndexer(chained)["a"].apply(func)
+
+    batch = AtIndexer(tree).batch()
+    batch = batch["a"].set(100)["b"].apply(func)["c"]["d"].set(400)
+    # operations are applied in order
+    expected = dict(a=101, b=[2, 3, 4], c=dict(d=400, e=5))
+    assert batch["a"].apply(func).commit() == chained == expected
+    # the input tree is not modified
+    assert tree == dict(a=1, b=[1, 2, 3], c=dict(d=4, e=5))
+    # the indexer path is a prefix for all operations
+    batch = AtIndexer(tree)["c"].batch()
+    assert batch["d"].set(0)["e"].set(1).commit() == dict(
+        a=1, b=[1, 2, 3], c=dict(d=0, e=1)
+    )
+    # no operations
+    assert AtIndexer(tree).batch().commit() == tree
+
+    with pytest.raises(LookupError):
+        AtIndexer(tree).batch()["x"].set(0).commit()
+
+
+def test_batch_treeclass():
+    @autoinit
+    class Tree(TreeClass):
+        a: int = 1
+        b: tuple = (2, 3)
+
+    tree = Tree()
+    out = tree.at.batch()["a"].set(10)["b"][0].apply(lambda x: x * 10).commit()
+    assert isinstance(out, Tree)
+    assert out.a == 10 and out.b == (20, 3)
+    # same structure set value is not broadcasted
+    out = tree.at.batch()[...].set(Tree(a=4, b=(5, 6))).commit()
+    assert out.a == 4 and out.b == (5, 6)
+
+
+def test_batch_flatten_once(monkeypatch):
+    counts = dict(flatten=0, unflatten=0)
+    tree_flatten = treelib.tree_flatten
+    tree_unflatten = treelib.tree_unflatten
+
+    def counting_flatten(tree, *args, **kwargs):
+        counts["flatten"] += tree is target
+        return tree_flatten(tree, *args, **kwargs)
+
+    def counting_unflatten(*args, **kwargs):
+        counts["unflatten"] += 1
+        return tree_unflatten(*args, **kwargs)
+
+    monkeypatch.setattr(treelib, "tree_flatten", staticmethod(counting_flatten))
+    monkeypatch.setattr(treelib, "tree_unflatten", staticmethod(counting_unflatten))
+
+    target = dict(a=1, b=[2, 3], c=dict(d=4))
+    batch = AtIndexer(target).batch()
+    batch["a"].set(10)["b"].apply(lambda x: x + 1)["c"]["d"].set(40).commit()
+    assert counts == dict(flatten=1, unflatten=1)
+
+
+@pytest.mark.benchmark(group="indexer")
+def test_benchmark_indexer_batch(benchmark):
+    tree = dict(a=[1] * 1_000, b=[dict(c=2, d=3) for _ in range(1_000)])
+    batch = AtIndexer(tree).batch()["a"].set(0)["b"][...]["c"].set(10)
+    benchmark(lambda: batch["b"][...]["d"].apply(lambda x: x + 1).commit())
+
+
+def test_method_call_structural_sharing():
+    @leafwise
+    @autoinit
+    class Leaf(TreeClass):
+        a: int = 1
+
+        def increment(self):
+            self.a += 1
+
+    @autoinit
+    class Node(TreeClass):
+        left: Leaf = Leaf()
+        right: Leaf = Leaf()
+        data: list = None
+
+        def set_left(self, value):
+            self.left.a = value
+
+    tree = Node(data=[object()])
+    _, new = tree.at["left"]["increment"]()
+    assert new.left.a == 2 and tree.left.a == 1
+    # the sibling subtree is shared with the original tree
+    assert new.right is tree.right
+    assert new.data is tree.data
+    assert new.left is not tree.left
+    # the cloned nodes are immutable
+    with pytest.raises(AttributeError):
+        new.left.a = 3
+    with pytest.raises(AttributeError):
+        new.right.a = 3
+
+    # methods of the root can mutate nested nodes
+    _, new = tree.at["set_left"](10)
+    assert new.left.a == 10 and tree.left.a == 1
+    assert new.data is not tree.data
+
+    # immutable array leaves are shared
+    if backend == "jax":
+        array = arraylib.ones(3)
+        _, new = Node(right=Leaf(array)).at["set_left"](1)
+        assert new.right.a is array
+
+
+@pytest.mark.benchmark(group="method_call")
+def test_benchmark_method_call(benchmark):
+    import tracemalloc
+
+    @autoinit
+    class Leaf(TreeClass):
+        a: int = 1
+
+        def set_a(self, value):
+            self.a = value
+
+    @autoinit
+    class Model(TreeClass):
+        head: Leaf = Leaf()
+        layers: list = None
+
+    tree = Model(layers=[Leaf(a=[object()] * 10) for _ in range(1_000)])
+    tracemalloc.start()
+    tree.at["head"]["set_a"](2)
+    benchmark.extra_info["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    benchmark(lambda: tree.at["head"]["set_a"](2))
+
+
+@pytest.mark.benchmark(group="method_call")
+def test_benchmark_method_call_root(benchmark):
+    import tracemalloc
+
+    @autoinit
+    class Leaf(TreeClass):
+        a: int = 1
+
+    @autoinit
+    class Model(TreeClass):
+        head: Leaf = Leaf()
+        layers: list = None
+
+        def set_a(self, value):
+            self.head.a = value
+
+    # same update as `test_benchmark_method_call` through a root method, that
+    # copies the whole tree instead of sharing the untouched layers
+    tree = Model(layers=[Leaf(a=[object()] * 10) for _ in range(1_000)])
+    tracemalloc.start()
+    tree.at["set_a"](2)
+    benchmark.extra_info["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    benchmark(lambda: tree.at["set_a"](2))
+
+
+def test_method_call_mutable_scope():
+    import threading
+
+    from pytreeclass._src.tree_base import MutableScope, is_mutable
+
+    @autoinit
+    class Tree(TreeClass):
+        a: int = 1
+
+        def fail(self):
+            self.a = 2
+            raise ValueError
+
+        def scope(self):
+            return is_mutable(self)
+
+    tree = Tree()
+    # the scope is exited even if the method raises
+    with pytest.raises(ValueError):
+        tree.at["fail"]()
+    assert tree.a == 1
+    with pytest.raises(AttributeError):
+        tree.a = 2
+
+    # the scope of a thread is not visible to other threads
+    started, finished = threading.Event(), threading.Event()
+    nodes = []
+
+    class Waiting(Tree):
+        def wait(self):
+            nodes.append(self)
+            started.set()
+            finished.wait()
+
+    waiting = Waiting()
+    thread = threading.Thread(target=lambda: waiting.at["wait"]())
+    thread.start()
+    started.wait()
+    # the copy is mutable only inside the thread running the method
+    assert not is_mutable(nodes[0])
+    finished.set()
+    thread.join()
+
+    assert tree.at["scope"]()[0] is True
+    assert not is_mutable(tree)
+
+    # subtree nodes are collected when the scope is created
+    scope = MutableScope(dict(a=[tree]), recursive=True)
+    assert id(tree) in scope.nodes and tree in scope
+
+
+def test_method_call_adopted_argument():
+    class Tree(TreeClass):
+        def __init__(self, x: int, c: Any = None):
+            self.x = x
+            self.c = c
+
+        def adopt(self, other):
+            self.c = other
+            self.c.x = 99
+
+    ext = Tree(1)
+    # objects assigned to the tree inside the method are not mutable
+    with pytest.raises(AttributeError):
+        Tree(0).at["adopt"](ext)
+    assert ext.x == 1
+
+
+@pytest.mark.benchmark(group="method_call")
+def test_benchmark_method_call_deep(benchmark):
+    class Node(TreeClass):
+        def __init__(self, depth: int):
+            self.a = 1
+            self.child = Node(depth - 1) if depth else None
+
+        def set_a(self, value):
+            self.a = value
+
+    tree = Node(200)
+    benchmark(lambda: tree.at["set_a"](2))
+
+
+def test_path_flatten_paths_cache():
+    tree = {"a": [1, 2], "b": (3, {"c": 4})}
+    paths = [p for p, _ in treelib.tree_path_flatten(tree)[0]]
+    # same structure reuses the cached paths
+    other = {"a": [5, 6], "b": (7, {"c": 8})}
+    path_leaves, _ = treelib.tree_path_flatten(other)
+    assert [p for p, _ in path_leaves] == paths
+    assert [leaf for _, leaf in path_leaves] == [5, 6, 7, 8]
+    # different structure does not reuse the paths
+    other = {"a": [5, 6, 7]}
+    assert len(treelib.tree_path_flatten(other)[0]) == 3
+    mapped = treelib.tree_path_map(lambda p, x: (len(p), x), tree)
+    assert mapped == {"a": [(2, 1), (2, 2)], "b": ((2, 3), {"c": (3, 4)})}
+
+
+@pytest.mark.skipif(backend != "jax", reason="jax backend needed")
+def test_path_flatten_data_keyed_node():
+    import jax.tree_util as jtu
+
+    class Named:
+        def __init__(self, names, values):
+            self.names = names
+            self.values = values
+
+    def flatten_with_keys(tree):
+        keys = [jtu.GetAttrKey(name) for name in tree.names]
+        return tuple(zip(keys, tree.values)), None
+
+    jtu.register_pytree_with_keys(
+        Named,
+        flatten_with_keys,
+        lambda _, values: Named(["_"] * len(values), list(values)),
+        lambda tree: (tree.values, None),
+    )
+
+    # same treedef, but the keys are computed from the node data
+    for names in (["a", "b"], ["x", "y"], ["a", "b"]):
+        path_leaves, _ = treelib.tree_path_flatten(Named(names, [1, 2]))
+        assert [p[-1].name for p, _ in path_leaves] == names
+
+    mapped = treelib.tree_path_map(lambda p, x: p[-1].name, Named(["x", "y"], [3, 4]))
+    assert mapped.values == ["x", "y"]
+    assert AtIndexer(Named(["x", "y"], [3, 4]), where=("y",)).get().values == [None, 4]
+
+
+@pytest.mark.skipif(backend != "jax", reason="jax backend needed")
+def test_where_plan_data_keyed_node():
+    import jax.tree_util as jtu
+
+    class Named:
+        def __init__(self, names, values):
+            self.names = names
+            self.values = values
+
+    def flatten_with_keys(tree):
+        keys = [jtu.GetAttrKey(name) for name in tree.names]
+        return tuple(zip(keys, tree.values)), None
+
+    jtu.register_pytree_with_keys(
+        Named,
+        flatten_with_keys,
+        lambda _, values: Named(["_"] * len(values), list(values)),
+        lambda tree: (tree.values, None),
+    )
+
+    # same treedef, but the `where` plan differs with the node data
+    assert AtIndexer(Named(("x", "y"), [1, 2]))["x"].get().values == [1, None]
+    assert AtIndexer(Named(("y", "x"), [1, 2]))["x"].get().values == [None, 2]
+    assert AtIndexer(Named(("y", "x"), [1, 2]))["x"].set(0).values == [1, 0]
+
+
+@pytest.mark.benchmark(group="path_map")
+def test_benchmark_path_map(benchmark):
+    @autoinit
+    class Linear(TreeClass):
+        weight: float = 1.0
+        bias: float = 0.0
+
+    model = [Linear() for _ in range(500)]
+    benchmark(lambda: treelib.tree_path_map(lambda p, x: x, model))
+
+
+def test_concurrent_map_persistent_pool():
+    from pytreeclass._src.backend.treelib.base import (
+        concurrent_map,
+        get_executor,
+        shutdown_executors,
+    )
+
+    executor = get_executor("thread", 2)
+    flat = [list(range(10))]
+    assert concurrent_map(lambda x: x + 1, flat, max_workers=2) == list(range(1, 11))
+    # the pool is reused across calls
+    assert get_executor("thread", 2) is executor
+    assert concurrent_map(abs, [[-1, -2, -3]], max_workers=2, chunksize=2) == [1, 2, 3]
+
+    with pytest.raises(ValueError):
+        concurrent_map(abs, flat, chunksize=0)
+
+    def raise_error(x):
+        raise ZeroDivisionError("error")
+
+    with pytest.raises(ZeroDivisionError):
+        concurrent_map(raise_error, flat, max_workers=2)
+
+    # nested parallel maps do not wait on the workers of the same pool
+    def nested(x):
+        return sum(concurrent_map(lambda y: y, [[x] * 4], max_workers=1))
+
+    assert concurrent_map(nested, [[1, 2]], max_workers=1) == [4, 8]
+    assert treelib.tree_map(abs, [-1, -2], is_parallel=dict(max_workers=1)) == [1, 2]
+
+    shutdown_executors()
+    assert get_executor("thread", 2) is not executor
+
+
+def _triple(x):
+    return x * 3
+
+
+@pytest.mark.skipif(backend == "jax", reason="forking a multithreaded jax process")
+def test_process_map_new_main_function(monkeypatch):
+    import __main__
+
+    config = dict(kind="process", max_workers=1)
+    # fork the workers of the persistent process pool
+    assert treelib.tree_map(_double, [1, 2], is_parallel=config) == [2, 4]
+
+    # a function defined in `__main__` after the workers are forked
+    monkeypatch.setattr(_triple, "__module__", "__main__")
+    monkeypatch.setattr(__main__, "_triple", _triple, raising=False)
+    assert treelib.tree_map(_triple, [1, 2], is_parallel=config) == [3, 6]
+
+
+@pytest.mark.benchmark(group="parallel_map")
+@pytest.mark.parametrize("is_parallel", [False, True])
+def test_benchmark_parallel_map(benchmark, is_parallel):
+    tree = list(range(10_000))
+    benchmark(lambda: treelib.tree_map(abs, tree, is_parallel=is_parallel))
+
+
+def test_concurrent_map_cost_chunking():
+    from pytreeclass._src.backend.treelib.base import concurrent_map, cost_chunks
+
+    # costly leaves are in the first chunks, cheap leaves are grouped
+    assert cost_chunks([1, 1, 10, 1, 1, 6], num_chunks=2) == [[2], [5, 0, 1, 3, 4]]
+
+    flat = [list(range(20))]
+    expected = [x * 2 for x in range(20)]
+    assert concurrent_map(lambda x: x * 2, flat, chunking="cost") == expected
+    assert concurrent_map(lambda x: x * 2, flat, chunking=lambda a: a[0]) == expected
+
+    with pytest.raises(ValueError):
+        concurrent_map(abs, flat, chunking="unknown")
+
+
+@pytest.mark.skipif(backend == "default", reason="no array backend installed")
+def test_apply_cost_chunking():
+    tree = dict(a=arraylib.ones([100, 100]), b=list(range(100)))
+    config = dict(chunking="cost", max_workers=2)
+    assert is_tree_equal(
+        AtIndexer(tree)[...].apply(lambda x: x + 1, is_parallel=config),
+        dict(a=arraylib.ones([100, 100]) + 1, b=list(range(1, 101))),
+    )
+
+
+@pytest.mark.skipif(backend != "numpy", reason="threads release the GIL in numpy")
+@pytest.mark.benchmark(group="parallel_chunking")
+@pytest.mark.parametrize("chunking", ["count", "cost"])
+def test_benchmark_parallel_chunking(benchmark, chunking):
+    tree = [arraylib.ones(2_000_000), arraylib.ones(2_000_000), *range(1000)]
+    config = dict(chunking=chunking)
+    benchmark(lambda: treelib.tree_map(arraylib.sqrt, tree, is_parallel=config))
+
+
+def test_async_tree_map():
+    import asyncio
+
+    running = []
+    peak = []
+
+    async def double(x):
+        running.append(x)
+        peak.append(len(running))
+        await asyncio.sleep(0.001)
+        running.remove(x)
+        return x * 2
+
+    tree = {"a": [1, 2, 3], "b": (4, 5)}
+    out = asyncio.run(treelib.async_tree_map(double, tree, max_concurrency=2))
+    assert out == {"a": [2, 4, 6], "b": (8, 10)}
+    assert max(peak) == 2
+
+    async def add(x, y):
+        return x + y
+
+    assert asyncio.run(treelib.async_tree_map(add, [1, 2], [10, 20])) == [11, 22]
+
+    out = asyncio.run(AtIndexer(tree)["a"].apply_async(double))
+    assert out == {"a": [2, 4, 6], "b": (4, 5)}
+
+    async def fail(x):
+        raise ValueError("error")
+
+    with pytest.raises(ValueError):
+        asyncio.run(treelib.async_tree_map(fail, tree))
+
+
+@pytest.mark.benchmark(group="async_map")
+def test_benchmark_async_tree_map(benchmark):
+    import asyncio
+
+    async def load(x):
+        await asyncio.sleep(0.001)  # e.g. i/o bound leaf loading
+        return x
+
+    tree = list(range(200))
+    func = lambda: asyncio.run(treelib.async_tree_map(load, tree, max_concurrency=50))
+    benchmark(func)
+
+
+def _double(x):
+    return x * 2
+
+
+def _view(x):
+    return x[:10]
+
+
+def _double_or_raise(x):
+    if x[0] == 2:
+        raise ValueError("error")
+    return x * 2
+
+
+@pytest.mark.skipif(backend != "numpy", reason="shared memory of numpy arrays")
+def test_process_map_shared_memory():
+    import os
+
+    from pytreeclass._src.backend.treelib.base import concurrent_map
+
+    def blocks():
+        return set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+
+    before = blocks()
+    tree = [arraylib.ones(2**18), arraylib.arange(2**18), 1, "a"]
+    config = dict(kind="process", max_workers=1, shared_memory=True)
+    out = treelib.tree_map(_double, tree, is_parallel=config)
+    assert is_tree_equal(
+        out, [arraylib.ones(2**18) * 2, arraylib.arange(2**18) * 2, 2, "aa"]
+    )
+    # views of the shared arguments are copied
+    out = concurrent_map(_view, [tree[:2]], **config)
+    assert is_tree_equal(out, [arraylib.ones(10), arraylib.arange(10)])
+    out = AtIndexer(tree)[0].apply(_double, is_parallel=config)
+    assert is_tree_equal(out, [arraylib.ones(2**18) * 2, *tree[1:]])
+
+    with pytest.raises(TypeError):
+        concurrent_map(_double, [[arraylib.ones(2**18), None]], **config)
+
+    # the results of a chunk that raised on its second element are released
+    args = [arraylib.ones(2**18), arraylib.ones(2**18) * 2, arraylib.ones(2**18)]
+    with pytest.raises(ValueError):
+        concurrent_map(_double_or_raise, [args], chunksize=3, **config)
+
+    # the shared memory blocks are released
+    assert blocks() == before
+
+
+@pytest.mark.skipif(backend != "numpy", reason="shared memory of numpy arrays")
+@pytest.mark.benchmark(group="process_map")
+@pytest.mark.parametrize("shared_memory", [False, True])
+def test_benchmark_process_map(benchmark, shared_memory):
+    tree = [arraylib.ones(2**20) for _ in range(8)]
+    config = dict(kind="process", max_workers=1, shared_memory=shared_memory)
+    benchmark(lambda: treelib.tree_map(_double, tree, is_parallel=config))
@@ -436,3 +436,56 @@ def test_array_tree_mask_tree_unmask():
     assert not (frozen_array == freeze(arraylib.ones((5, 6))))
     # assert not (frozen_array == freeze(arraylib.ones((5, 5)).astype(arraylib.uint8)))
     assert hash(frozen_array) == hash(frozen_array)
+
+
+@pytest.mark.skipif(backend == "default", reason="no array backend installed")
+def test_frozen_array_hash(monkeypatch):
+    from pytreeclass._src.backend import arraylib as backend_arraylib
+    from pytreeclass._src.tree_mask import _array_hash_registry
+
+    lhs = arraylib.arange(10)
+    assert hash(freeze(lhs)) == hash(freeze(arraylib.arange(10)))
+    assert hash(freeze(lhs)) != hash(freeze(arraylib.arange(1, 11)))
+    # non-contiguous arrays are hashed by value
+    assert hash(freeze(arraylib.arange(20)[::2])) == hash(freeze(lhs * 2))
+
+    # memoized per array version
+    if backend_arraylib.version(lhs) is not None:
+        assert id(lhs) in _array_hash_registry
+
+    for method in ("blake2b", "sha256"):
+        monkeypatch.setitem(freeze.array_hash_config, "method", method)
+        assert hash(freeze(lhs)) == hash(freeze(arraylib.arange(10)))
+
+    # sampled fingerprint of large arrays
+    monkeypatch.setitem(freeze.array_hash_config, "method", "blake2b")
+    monkeypatch.setitem(freeze.array_hash_config, "sample_threshold", 8)
+    monkeypatch.setitem(freeze.array_hash_config, "num_samples", 4)
+    assert hash(freeze(lhs)) == hash(freeze(arraylib.arange(10)))
+
+    monkeypatch.setitem(freeze.array_hash_config, "method", "unknown")
+    with pytest.raises(ValueError):
+        hash(freeze(arraylib.arange(10)))
+
+
+@pytest.mark.skipif(backend != "numpy", reason="numpy specific")
+def test_frozen_array_hash_numpy_version():
+    import numpy as np
+
+    from pytreeclass._src.tree_mask import _array_hash_registry
+
+    array = np.zeros(4)
+    lhs = hash(freeze(array))
+    # writeable numpy arrays are not memoized
+    assert id(array) not in _array_hash_registry
+    array[0] = 1
+    assert hash(freeze(array)) != lhs
+
+    array.flags.writeable = False
+    hash(freeze(array))
+    assert id(array) in _array_hash_registry
+    # read-only views of writeable arrays are not memoized
+    view = np.zeros(4)[:2]
+    view.flags.writeable = False
+    hash(freeze(view))
+    assert id(view) not in _array_hash_registry
@@ -265,3 +265,173 @@ def test_tree_graph():
         re.sub(r"\b\d{10,}", "***", tree_graph(r1))
         == 'digraph G {\n    *** [label="Repr1", shape=box];\n    *** [label=".a=1", shape=box];\n    *** -> ***;\n    *** [label=".b=string", shape=box];\n    *** -> ***;\n    *** [label=".c=1.0", shape=box];\n    *** -> ***;\n    *** [label=".d=aaaaa", shape=box];\n    *** -> ***;\n    *** [label=".e:list", shape=box];\n    *** -> ***;\n    *** [label="[0]=10", shape=box];\n    *** -> ***;\n    *** [label="[1]=10", shape=box];\n    *** -> ***;\n    *** [label="[2]=10", shape=box];\n    *** -> ***;\n    *** [label="[3]=10", shape=box];\n    *** -> ***;\n    *** [label="[4]=10", shape=box];\n    *** -> ***;\n    *** [label=".f={...}", shape=box];\n    *** -> ***;\n    *** [label=".g:dict", shape=box];\n    *** -> ***;\n    *** [label="[\'a\']=aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa", shape=box];\n    *** -> ***;\n    *** [label="[\'b\']=bbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbb", shape=box];\n    *** -> ***;\n    *** [label="[\'c\']=f32[5,5](μ=1.00, σ=0.00, ∈[1.00,1.00])", shape=box];\n    *** -> ***;\n    *** [label=".h=f32[5,1](μ=1.00, σ=0.00, ∈[1.00,1.00])", shape=box];\n    *** -> ***;\n    *** [label=".i=f32[1,6](μ=1.00, σ=0.00, ∈[1.00,1.00])", shape=box];\n    *** -> ***;\n    *** [label=".j=f32[1,1,4,5](μ=1.00, σ=0.00, ∈[1.00,1.00])", shape=box];\n    *** -> ***;\n    *** [label=".k:tuple", shape=box];\n    *** -> ***;\n    *** [label="[0]=1", shape=box];\n    *** -> ***;\n    *** [label="[1]=2", shape=box];\n    *** -> ***;\n    *** [label="[2]=3", shape=box];\n    *** -> ***;\n    *** [label=".l:a", shape=box];\n    *** -> ***;\n    *** [label=".b=1", shape=box];\n    *** -> ***;\n    *** [label=".c=2", shape=box];\n    *** -> ***;\n    *** [label=".m=f32[5,5](μ=1.00, σ=0.00, ∈[1.00,1.00])", shape=box];\n    *** -> ***;\n    *** [label=".n=bool[]", shape=box];\n    *** -> ***;\n    *** [label=".o=c64[2]", shape=box];\n    *** -> ***;\n}'
     )
+
+
+def test_tree_summary_iter_rows():
+    tree = {"a": [1, 2], "b": 3.0, "c": (3, [4, 5])}
+    is_list = lambda node: isinstance(node, list)
+
+    for depth in [0, 1, 2, float("inf")]:
+        for is_leaf in [None, is_list]:
+            rows = list(tree_summary.iter_rows(tree, depth=depth, is_leaf=is_leaf))
+            table = tree_summary(tree, depth=depth, is_leaf=is_leaf)
+            assert _table([["Name", "Type", "Count", "Size"], *rows]) == table
+            assert rows[-1][:3] == ["Σ", "dict", "6"]
+
+    rows = list(tree_summary.iter_rows(tree, is_leaf=is_list))
+    assert [(row[1], row[2]) for row in rows] == [
+        ("list", "2"),
+        ("float", "1"),
+        ("int", "1"),
+        ("list", "2"),
+        ("dict", "6"),
+    ]
+
+    # rows are streamed
+    assert next(tree_summary.iter_rows(tree))[1:] == ["int", "1", ""]
+
+    with pytest.raises(TypeError):
+        tree_summary.iter_rows(tree, depth="a")
+
+
+@pytest.mark.benchmark(group="tree_summary")
+def test_benchmark_tree_summary(benchmark):
+    tree = [{"w": arraylib.ones(2), "b": arraylib.ones(1), "n": i} for i in range(2000)]
+    benchmark(tree_summary, tree)
+
+
+def test_tree_visualizers_iter_lines():
+    tree = {"a": [1, 2], "b": None, "c": (3, [4, {"d": 5}])}
+
+    for func in [tree_diagram, tree_mermaid, tree_graph]:
+        for depth in [0, 1, 2, float("inf")]:
+            text = "\n".join(func.iter_lines(tree, depth=depth))
+            # node ids differ between calls
+            mask = lambda text: re.sub(r"\d{10,}", "***", text)
+            assert mask(text) == mask(func(tree, depth=depth))
+
+    lines = list(tree_diagram.iter_lines([1, [2]]))
+    marks = ["list", "├── ", "└── ", "    └── "]
+    assert [line[: len(mark)] for line, mark in zip(lines, marks)] == marks
+
+    with pytest.raises(TypeError):
+        tree_diagram.iter_lines(tree, depth="a")
+
+    # deeper than the recursion limit
+    deep = 0
+    for i in range(2000):
+        deep = [deep, i]
+    lines = tree_diagram(deep).split("\n")
+    assert len(lines) == 2000 * 2 + 1
+    assert lines[-1].lstrip(" │").startswith("└── ")
+
+
+@pytest.mark.benchmark(group="tree_diagram")
+@pytest.mark.parametrize("func", [tree_diagram, tree_mermaid, tree_graph])
+def test_benchmark_tree_diagram(benchmark, func):
+    # 100k nodes
+    tree = [{"a": i, "b": (i, [i, i])} for i in range(100_000 // 7)]
+    benchmark(func, tree)
+
+
+def test_format_width_carried_width():
+    from pytreeclass._src.tree_pprint import Text, format_width
+
+    text = Text("\n\t[1, \n\t2]\n", 6)
+    assert text.width == 6
+    assert ("a" + text + "\tb").width == 8
+    assert isinstance("a" + text, Text)
+    # the carried width decides whether to strip the newline/tab characters
+    assert format_width(text, width=6) == "[1, 2]"
+    assert format_width(Text(text, 100), width=6) == text
+    assert format_width("\n\t[1, \n\t2]\n", width=5) == "\n\t[1, \n\t2]\n"
+
+    tree = [[1, "a" * 50], [2, "b" * 10]]
+    assert type(tree_repr(tree)) is str
+    assert (
+        tree_repr(tree, width=40)
+        == "[\n  [\n    1, \n    " + "a" * 50 + "\n  ], \n  [2, bbbbbbbbbb]\n]"
+    )
+    assert tree_repr(tree) == f"[[1, {'a' * 50}], [2, bbbbbbbbbb]]"
+
+
+@pytest.mark.benchmark(group="tree_repr")
+def test_benchmark_tree_repr_deep(benchmark):
+    @autoinit
+    class Layer(TreeClass):
+        w: Any
+        b: Any
+
+    tree = 0
+    for i in range(100):
+        tree = Layer(tree, [i, "x" * 10])
+    benchmark(tree_repr, tree)
+
+
+@pytest.mark.skipif(backend == "default", reason="no array backend")
+def test_tree_repr_stats():
+    from pytreeclass._src.tree_pprint import _stats_cache
+
+    x = arraylib.ones(10) * 2
+    assert tree_repr(x) == tree_repr(x, stats="exact")
+    assert tree_repr(x).endswith("[10](μ=2.00, σ=0.00, ∈[2.00,2.00])")
+    assert tree_repr(x, stats="off").endswith("[10]")
+    # small arrays are not sampled
+    assert tree_repr(x, stats="approx") == tree_repr(x)
+
+    y = arraylib.arange(2**18) * 1.0
+    text = tree_repr(y, stats="approx")
+    assert "(μ≈131070.00, σ≈75674.45, ∈≈[0.00,262140.00])" in text
+
+    tree_repr.stats = "off"
+    try:
+        assert tree_repr([x]).endswith("[10]]")
+    finally:
+        tree_repr.stats = "exact"
+
+    with pytest.raises(ValueError):
+        tree_repr(x, stats="fast")
+
+    if backend == "jax":
+        # immutable arrays statistics are cached by identity
+        key = (id(x), 1)
+        assert key in _stats_cache
+        del x
+        assert key not in _stats_cache
+
+
+@pytest.mark.skipif(backend == "default", reason="no array backend")
+@pytest.mark.benchmark(group="array_pp")
+@pytest.mark.parametrize("stats", ["exact", "approx"])
+def test_benchmark_array_pp(benchmark, stats):
+    tree = [arraylib.ones(2**20) + i for i in range(8)]
+    benchmark(tree_repr, tree, stats=stats)
+
+
+def test_tree_repr_budget():
+    tree = {"a": 1, "b": [2, 3], "c": {"d": 4, "e": 5}}
+    assert tree_repr(tree, budget=4) == "{a:1, b:[2, ...(1 more)], ...(1 more)}"
+    assert tree_str(tree, budget=2) == "{a:1, ...(2 more)}"
+    assert tree_repr(tree, budget=100) == tree_repr(tree)
+    assert tree_repr(list(range(10**6)), budget=3) == "[0, 1, ...(999998 more)]"
+
+    @autoinit
+    class Tree(TreeClass):
+        a: Any = 1
+        b: Any = 2
+
+    assert tree_repr(Tree(), budget=2) == "Tree(a=1, ...(1 more))"
+
+    tree_repr.budget = 2
+    try:
+        assert repr(Tree()) == "Tree(a=1, ...(1 more))"
+    finally:
+        tree_repr.budget = float("inf")
+    assert repr(Tree()) == "Tree(a=1, b=2)"
+
+
+@pytest.mark.benchmark(group="tree_repr_budget")
+@pytest.mark.parametrize("budget", [None, 50])
+def test_benchmark_tree_repr_budget(benchmark, budget):
+    tree = [{"a": i, "b": [i, str(i)]} for i in range(10_000)]
+    benchmark(tree_repr, tree, budget=budget)
@@ -28,7 +28,11 @@ from pytreeclass._src.code_build import (
     field,
     fields,
 )
-from pytreeclass._src.tree_base import TreeClass
+from pytreeclass._src.tree_base import (
+    TreeClass,
+    add_mutable_entry,
+    discard_mutable_entry,
+)
 from pytreeclass._src.tree_mask import freeze
 from pytreeclass._src.tree_util import Partial, is_tree_equal
 
@@ -661,3 +665,445 @@ def test_unannotated_field():
         a = field(default=1)
 
     assert str(T.a.type) == "NULL"
+
+
+def test_cached_hash():
+    class Leaf:
+        calls = 0
+
+        def __init__(self, value):
+            self.value = value
+
+        def __hash__(self):
+            Leaf.calls += 1
+            return hash(self.value)
+
+    @autoinit
+    class Child(TreeClass):
+        leaf: Any
+
+    @autoinit
+    class Parent(TreeClass):
+        child: Child
+        b: int = 1
+
+        def set_b(self, b):
+            self.b = b
+
+    child = Child(Leaf(1))
+    tree = Parent(child)
+    assert hash(tree) == hash(tree)
+    assert Leaf.calls == 1
+
+    # the hash of the shared subtree is reused
+    assert hash(Parent(child, b=2)) != hash(tree)
+    assert Leaf.calls == 1
+
+    # equal trees have equal hashes
+    assert hash(tree) == hash(Parent(Child(Leaf(1))))
+    assert Leaf.calls == 2
+
+    # controlled mutation returns a new instance with a new hash
+    _, tree2 = tree.at["set_b"](2)
+    assert hash(tree2) == hash(Parent(child, b=2))
+
+    # in-place mutation of a mutable instance invalidates the cached hash
+    tree_hash = hash(tree)
+    add_mutable_entry(tree)
+    tree.b = 2
+    assert hash(tree) != tree_hash
+    discard_mutable_entry(tree)
+    assert hash(tree) == hash(tree2)
+
+
+def test_cached_hash_frozen():
+    calls = []
+
+    class Leaf:
+        def __hash__(self):
+            calls.append(1)
+            return 0
+
+    frozen = freeze(Leaf())
+    assert hash(frozen) == hash(frozen)
+    assert len(calls) == 1
+
+
+def test_tree_equal_short_circuit():
+    calls = []
+
+    class Leaf:
+        def __init__(self, value):
+            self.value = value
+
+        def __eq__(self, other):
+            calls.append(self.value)
+            return self.value == other.value
+
+        def __hash__(self):
+            return hash(self.value)
+
+    lhs = [Leaf(1), Leaf(2), Leaf(3)]
+    rhs = [Leaf(1), Leaf(0), Leaf(3)]
+    assert not is_tree_equal(lhs, rhs)
+    # stops at the first mismatch
+    assert calls == [1, 2]
+
+    calls.clear()
+    # identical leaves are not compared
+    assert is_tree_equal(lhs, [lhs[0], lhs[1], Leaf(3)])
+    assert calls == [3]
+
+    @autoinit
+    class Tree(TreeClass):
+        a: Any
+
+    lhs, rhs = Tree([1]), Tree([2])
+    assert hash(lhs) != hash(rhs)
+    # cached hashes are stale after in-place mutation of mutable leaves
+    rhs.a[0] = 1
+    assert lhs == rhs
+    assert is_tree_equal(lhs, rhs)
+
+
+@pytest.mark.skipif(backend == "default", reason="no array backend installed")
+def test_tree_equal_arrays():
+    lhs = arraylib.arange(2**20)
+    rhs = arraylib.arange(2**20)
+    assert is_tree_equal([lhs, 1], [rhs, 1])
+    assert not is_tree_equal([lhs, 1], [rhs * 2, 1])
+    assert not is_tree_equal([lhs], [lhs.reshape(2, -1)])
+    nan = arraylib.array([1.0, float("nan")])
+    assert not is_tree_equal([nan], [nan * 1])
+
+
+@pytest.mark.benchmark(group="tree_equal")
+def test_benchmark_tree_equal(benchmark):
+    lhs = [dict(a=i, b=str(i)) for i in range(10_000)]
+    rhs = [dict(a=i, b=str(i)) for i in range(10_000)]
+    rhs[0] = dict(a=-1, b="-1")
+    benchmark(lambda: is_tree_equal(lhs, rhs))
+
+
+def test_fields_cache():
+    @autoinit
+    class Parent(TreeClass):
+        a: int = 1
+
+    @autoinit
+    class Child(Parent):
+        b: int = 2
+
+    assert fields(Child) is fields(Child()) is fields(Child)
+    assert [f.name for f in fields(Child)] == ["a", "b"]
+    # mutating the returned field map does not change the cache
+    build_field_map(Child).pop("a")
+    assert [f.name for f in fields(Child)] == ["a", "b"]
+
+    # the cache is invalidated when the class is decorated again
+    Child.__annotations__["c"] = int
+    Child.c = 3
+    del Child.__init__
+    autoinit(Child)
+    assert [f.name for f in fields(Child)] == ["a", "b", "c"]
+    assert Child().c == 3
+
+
+def build_deep_model(num_modules: int):
+    @autoinit
+    class Module(TreeClass):
+        weight: int = 1
+        bias: int = field(default=0, repr=False)
+
+    @autoinit
+    class Model(TreeClass):
+        modules: tuple
+
+    return Model(tuple(Module() for _ in range(num_modules)))
+
+
+@pytest.mark.benchmark(group="fields")
+def test_benchmark_fields(benchmark):
+    model = build_deep_model(1)
+    benchmark(lambda: fields(model))
+
+
+@pytest.mark.benchmark(group="fields")
+def test_benchmark_repr_1000_modules(benchmark):
+    model = build_deep_model(1_000)
+    benchmark(lambda: repr(model))
+
+
+def test_autoinit_direct_setattr():
+    @autoinit
+    class Tree(TreeClass):
+        a: int = field(on_setattr=[lambda x: x + 1])
+        b: int = 2
+        c: int = field(init=False, default=3)
+
+    assert vars(Tree(1)) == dict(a=2, b=2, c=3)
+
+    def fail(_):
+        raise ValueError("bad")
+
+    @autoinit
+    class Failing(TreeClass):
+        a: int = field(on_setattr=[fail])
+
+    # the error message of the callbacks is preserved
+    with pytest.raises(ValueError, match="On applying fail for field=`a`"):
+        Failing(1)
+
+    calls = []
+
+    @autoinit
+    class Base:
+        a: int = 1
+
+    class Child(Base):
+        # subclasses that are not decorated use `setattr`
+        def __setattr__(self, key, value):
+            calls.append(key)
+            super().__setattr__(key, value)
+
+    assert Base().a == 1 and calls == []
+    assert Child().a == 1 and calls == ["a"]
+
+    @autoinit
+    class Overridden(Base):
+        b: int = 2
+
+    # overridden field attributes are set with `setattr`
+    Overridden.a = property(lambda self: 10, lambda self, _: calls.append("b"))
+    del Overridden.__init__
+    calls.clear()
+    assert autoinit(Overridden)().a == 10 and calls == ["b"]
+
+
+@pytest.mark.parametrize("slots", [False, True])
+def test_autoinit_reinit_frozen(slots):
+    @autoinit(slots=slots)
+    class Tree(TreeClass):
+        a: int = 1
+
+    tree = Tree()
+    tree_hash = hash(tree)
+    # the fields are written directly only during initialization
+    with pytest.raises(AttributeError):
+        tree.__init__(2)
+    assert tree.a == 1 and hash(tree) == tree_hash
+
+
+@pytest.mark.benchmark(group="treeclass")
+def test_benchmark_treeclass_construction(benchmark):
+    @autoinit
+    class Sample(TreeClass):
+        x: int
+        y: int = 0
+        label: str = ""
+
+    benchmark(lambda: [Sample(i, i, "a") for i in range(1_000)])
+
+
+def test_descriptor_free_fields():
+    @autoinit
+    class Tree(TreeClass):
+        a: int = 1
+        b: int = field(default=2, on_getattr=[lambda x: x * 10])
+        c: int = field(default=3, on_setattr=[lambda x: x + 1])
+
+    tree = Tree()
+    # fields without callbacks are not data descriptors
+    assert not hasattr(type(vars(Tree)["a"]), "__set__")
+    assert hasattr(type(vars(Tree)["b"]), "__set__")
+    assert (tree.a, tree.b, tree.c) == (1, 20, 4)
+    # the field metadata is available on the class
+    assert (Tree.a.default, Tree.b.default) == (1, 2)
+    assert Tree.b.type is int
+    assert [f.name for f in fields(Tree)] == ["a", "b", "c"]
+    assert repr(Tree.b).startswith("Field(")
+    # replacing the callbacks changes the descriptor type
+    assert not hasattr(Tree.b.replace(on_getattr=()), "__set__")
+    assert hasattr(Tree.a.replace(on_setattr=[abs]), "__set__")
+
+    with pytest.raises(AttributeError):
+        tree.a = 2
+
+
+@pytest.mark.benchmark(group="attribute_access")
+def test_benchmark_attribute_access(benchmark):
+    @autoinit
+    class Linear(TreeClass):
+        weight: float = 1.0
+        bias: float = 0.0
+
+    layer = Linear()
+
+    def loop():
+        total = 0.0
+        for _ in range(10_000):
+            total += layer.weight + layer.bias
+        return total
+
+    benchmark(loop)
+
+
+def test_flatten_layout_reuse():
+    @autoinit
+    class Tree(TreeClass):
+        a: int = 1
+        b: int = 2
+
+    lhs, rhs = Tree(), Tree(3, 4)
+    (_, lhs_def), (_, rhs_def) = treelib.tree_flatten(lhs), treelib.tree_flatten(rhs)
+    assert lhs_def == rhs_def
+    assert [p for p, _ in treelib.tree_path_flatten(lhs)[0]] == [
+        p for p, _ in treelib.tree_path_flatten(rhs)[0]
+    ]
+
+    # dynamically added attributes fall back to a new layout
+    rhs = rhs.at["__setattr__"]("c", 5)[1]
+    leaves, treedef = treelib.tree_flatten(rhs)
+    assert leaves == [3, 4, 5]
+    assert treedef != lhs_def
+    assert treelib.tree_unflatten(treedef, leaves).c == 5
+    assert len(treelib.tree_path_flatten(rhs)[0]) == 3
+
+
+@pytest.mark.benchmark(group="flatten")
+def test_benchmark_flatten_unflatten(benchmark):
+    @autoinit
+    class Linear(TreeClass):
+        weight: float = 1.0
+        bias: float = 0.0
+        name: str = "linear"
+
+    tree = [Linear() for _ in range(1_000)]
+
+    def roundtrip():
+        leaves, treedef = treelib.tree_flatten(tree)
+        treelib.tree_path_flatten(tree)
+        return treelib.tree_unflatten(treedef, leaves)
+
+    benchmark(roundtrip)
+
+
+def test_autoinit_slots():
+    @autoinit(slots=True)
+    class Tree(TreeClass):
+        a: int = 1
+        b: int = field(default=-2, on_setattr=[abs])
+
+        def inc(self):
+            self.a += 1
+
+        def __post_init__(self):
+            # zero-argument super refers to the recreated class
+            super().__init__()
+
+    tree = Tree()
+    assert not hasattr(tree, "__dict__")
+    assert (tree.a, tree.b) == (1, 2)
+    assert [f.name for f in fields(Tree)] == ["a", "b"]
+    assert treelib.tree_flatten(tree)[0] == [1, 2]
+    assert tree.at["a"].set(10).a == 10
+    assert tree.at["inc"]()[1].a == 2
+    assert tree == Tree() and hash(tree) == hash(Tree())
+    assert repr(tree) == "Tree(a=1, b=2)"
+    assert copy.deepcopy(tree) == tree
+
+    with pytest.raises(AttributeError):
+        tree.a = 2
+
+    with pytest.raises(AttributeError):
+        # no `__dict__` to store non-field attributes
+        tree.at["__setattr__"]("c", 3)
+
+    @autoinit(slots=True)
+    class SubTree(Tree):
+        c: int = 3
+
+    assert SubTree.__slots__ == ("c",)
+    assert treelib.tree_flatten(SubTree())[0] == [1, 2, 3]
+    assert SubTree().at["inc"]()[1] == SubTree(a=2)
+
+    @autoinit
+    class DictTree(Tree):
+        c: int = 3
+
+    # fields are stored in both the base slots and the instance `__dict__`
+    tree = DictTree().at["__setattr__"]("d", 4)[1]
+    assert treelib.tree_flatten(tree)[0] == [1, 2, 3, 4]
+    assert treelib.tree_unflatten(*treelib.tree_flatten(tree)[::-1]) == tree
+
+
+def test_autoinit_slots_unset():
+    @autoinit(slots=True)
+    class Tree(TreeClass):
+        a: int = 1
+        b: int = field(init=False)
+
+    tree = Tree()
+    leaves, treedef = treelib.tree_flatten(tree)
+    assert leaves == [1]
+    assert treelib.tree_unflatten(treedef, leaves) == tree
+
+    with pytest.raises(TypeError):
+
+        @autoinit(slots=True)
+        class Slotted(TreeClass):
+            __slots__ = ()
+            a: int = 1
+
+
+class _Outer:
+    @autoinit(slots=True)
+    class Inner(TreeClass):
+        a: int = 1
+
+
+def test_autoinit_slots_pickle():
+    import pickle
+
+    assert _Outer.Inner.__qualname__ == "_Outer.Inner"
+    tree = _Outer.Inner(a=2)
+    assert pickle.loads(pickle.dumps(tree)) == tree
+
+
+@pytest.mark.benchmark(group="slots")
+@pytest.mark.parametrize("slots", [False, True])
+def test_benchmark_slots(benchmark, slots):
+    import tracemalloc
+
+    def build(slots: bool):
+        @autoinit(slots=slots)
+        class Particle(TreeClass):
+            x: float = 0.0
+            v: float = 1.0
+            m: float = 2.0
+
+        return Particle
+
+    def instance_bytes(klass) -> float:
+        tracemalloc.start()
+        instances = [klass() for _ in range(1_000)]
+        size = tracemalloc.get_traced_memory()[0] / len(instances)
+        tracemalloc.stop()
+        return size
+
+    # per-instance memory of the slots layout compared to the `__dict__` layout
+    sizes = {layout: instance_bytes(build(layout)) for layout in (False, True)}
+    benchmark.extra_info["instance_bytes"] = sizes[slots]
+    benchmark.extra_info["dict_instance_bytes"] = sizes[False]
+    assert sizes[True] < sizes[False]
+
+    klass = build(slots)
+    particles = [klass() for _ in range(1_000)]
+    leaves, treedef = treelib.tree_flatten(particles)
+
+    def run():
+        [klass() for _ in range(1_000)]
+        treelib.tree_flatten(particles)
+        return treelib.tree_unflatten(treedef, leaves)
+
+    benchmark(run)